@@ -0,0 +1,257 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from candidate_index import CandidateIndex
+from opening_book import strategy_name
+from simulate import read_answers, summarize
+from wordle import Wordle, DICTIONARIES, my_operation
+from ingest import ingest
+from word_store import compute_weights, letter_distribution
+from weight_models import PositionalModel
+
+
+# Times the solver without a browser and measures how well it plays, so changes to the operation, word_delta,
+# starting word or the word pickers can be compared run to run. Answers, guess/answer pairs and every game's random
+# picks come from fixed seeds, so two runs of the same code play exactly the same games.
+#
+#   python benchmark.py ./cache/benchmark.json                          # record a baseline
+#   python benchmark.py ./cache/new.json ./cache/benchmark.json         # compare against it
+
+
+OPERATIONS = {"sum": sum, "max": max, "min": min, "my_operation": my_operation, "positional": PositionalModel()}
+
+# entry points whose import is timed in a fresh interpreter, and the heavy dependencies none of them may load until a
+# browser game or an online lookup needs them
+STARTUP_MODULES = ["wordle", "find", "simulate", "server"]
+HEAVY_MODULES = ["selenium", "bs4", "requests", "pandas"]
+
+STARTUP_SCRIPT = """
+import sys, time
+s = time.perf_counter()
+import {module}
+print(time.perf_counter() - s)
+print(",".join(e for e in {heavy!r} if e in sys.modules))
+"""
+
+
+# seconds of every call of fn(), repeated runs times
+def timings(fn, runs):
+    times = []
+    for _ in range(runs):
+        s = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - s)
+    return times
+
+
+def stats(times):
+    return {
+        "runs": len(times),
+        "mean": statistics.fmean(times),
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+    }
+
+
+# seconds to import each of modules in a new python process, repeated runs times, and the heavy modules each one
+# loaded: ({module: times}, {module: [heavy modules]})
+def startup(modules=None, runs=5):
+    if modules is None:
+        modules = STARTUP_MODULES
+    times, loaded = {}, {}
+    for m in modules:
+        times[m] = []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT.format(module=m, heavy=HEAVY_MODULES)],
+                                 capture_output=True, text=True, check=True, cwd=Path(__file__).parent).stdout.split("\n")
+            times[m].append(float(out[0]))
+            loaded[m] = [e for e in out[1].split(",") if e != ""]
+    return times, loaded
+
+
+# the answers the games are played on: a seeded sample of the answer file, in file order
+def sample_answers(answers, games, seed=0):
+    if games is None or games >= len(answers):
+        return list(answers)
+    picked = set(random.Random(seed).sample(range(len(answers)), games))
+    return [w for i, w in enumerate(answers) if i in picked]
+
+
+# Runs the benchmark and returns the results as a JSON-able dict:
+#   "config": everything the results depend on
+#   "timings": stats in seconds for each phase
+#       import_<module>: importing an entry point in a new interpreter, see startup
+#       init / init_compiled: Wordle.__init__ building the store from the files / from the compiled cache
+#       load, index, distribution, weights: the steps of building the store
+#       purge: Wordle.purge of a random guess against a random answer on the full dictionary
+#       avg_weighted_word: picking a word from the full dictionary and from one purged by a random guess
+#       play: one whole game
+#   "quality": mean guesses, failures (unsolved or more than 6 guesses) and the guess distribution
+#   "startup": the heavy modules (selenium, bs4, requests, pandas) each entry point loaded on import
+def run(answers, games=200, seed=0, runs=5, dictionary=None, operation=sum, word_delta=None, starting_guess_word=None,
+        strategy=None, dist_file=None, reweight=False, print_statements=True):
+    if dictionary is None:
+        dictionary = DICTIONARIES
+    answers = sample_answers(answers, games, seed)
+    game_kwargs = {"dictionary": dictionary, "browser_game": False, "print_statements": False, "operation": operation,
+                   "word_delta": word_delta, "starting_guess_word": starting_guess_word, "strategy": strategy,
+                   "dist_file": dist_file, "reweight": reweight, "seed": seed}
+    results = {"timings": {}}
+
+    def record(name, times):
+        results["timings"][name] = stats(times)
+        if print_statements:
+            print(f"{name}: {statistics.fmean(times) * 1000:.3f}ms mean over {len(times)} runs.")
+
+    import_times, loaded = startup(runs=runs)
+    for m, times in import_times.items():
+        record(f"import_{m}", times)
+    results["startup"] = loaded
+
+    record("init", timings(lambda: Wordle(**game_kwargs, compile_dictionary=False), runs))
+    Wordle(**game_kwargs)
+    record("init_compiled", timings(lambda: Wordle(**game_kwargs), runs))
+
+    words = ingest(dictionary)
+    record("load", timings(lambda: ingest(dictionary), runs))
+    index = CandidateIndex(words)
+    record("index", timings(lambda: CandidateIndex(words), runs))
+    dist = letter_distribution(index, dist_file)
+    record("distribution", timings(lambda: letter_distribution(index, dist_file), runs))
+    record("weights", timings(lambda: compute_weights(index, dist, operation), runs))
+
+    game = Wordle(**game_kwargs)
+    rng = random.Random(seed)
+    words = [game.store.word(i) for i in game.store.ids]
+    pairs = [(rng.choice(words), rng.choice(answers)) for _ in range(max(runs, 1) * 20)]
+
+    def purge(pair):
+        game.reset(pair[1])
+        s = time.perf_counter()
+        game.purge(pair[0])
+        return time.perf_counter() - s
+    record("purge", [purge(e) for e in pairs])
+
+    def pick(pair):
+        game.reset(pair[1])
+        game.random.seed(seed)
+        game.guesses = 1
+        if pair[0] is not None:
+            game.candidates = game.purge(pair[0])[0]
+        s = time.perf_counter()
+        game.avg_weighted_word()
+        return time.perf_counter() - s
+    record("avg_weighted_word", [pick((None, pairs[0][1])) for _ in range(runs * 20)] + [pick(e) for e in pairs])
+
+    if getattr(game.strategy, "uses_patterns", False):
+        game.patterns
+    played, times = [], []
+    for w in answers:
+        game.reset(w)
+        # seeded per answer so a game doesn't depend on the games played before it
+        game.random.seed(f"{seed}:{w}")
+        s = time.perf_counter()
+        game.play()
+        times.append(time.perf_counter() - s)
+        played.append((w, game.guesses, len(game.history) > 0 and game.history[-1] == w))
+    record("play", times)
+
+    report = summarize(played)
+    failures = [w for w, g, solved in played if not solved or g > 6]
+    results["quality"] = {
+        "games": report["games"],
+        "mean_guesses": report["mean_guesses"],
+        "failures": len(failures),
+        "failed_words": failures,
+        "distribution": report["distribution"],
+    }
+    results["config"] = {
+        "games": len(answers),
+        "seed": seed,
+        "runs": runs,
+        "dictionary": list(dictionary),
+        "operation": getattr(operation, "__name__", type(operation).__name__),
+        "word_delta": game.word_delta,
+        "starting_guess_word": game.starting_guess_word,
+        "strategy": strategy_name(game.strategy),
+        "dist_file": dist_file,
+        "reweight": reweight,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+    if print_statements:
+        q = results["quality"]
+        print(f"Played {q['games']} games: mean {q['mean_guesses']:.3f} guesses, {q['failures']} failures.")
+    return results
+
+
+# Differences from a baseline that are worse than tolerance: timings whose median is more than tolerance (a
+# fraction) slower, and any rise in mean guesses or failures. Returns a list of messages, empty if nothing regressed.
+# Timings are compared on the median since single runs are noisy.
+def compare(results, baseline, tolerance=0.1):
+    regressions = []
+    differing = [k for k in ("games", "seed", "dictionary", "operation", "word_delta", "starting_guess_word", "strategy", "dist_file", "reweight")
+                 if results["config"].get(k) != baseline["config"].get(k)]
+    if len(differing) > 0:
+        regressions.append(f"Configs differ in {', '.join(differing)}; results are not comparable.")
+
+    for name, t in results["timings"].items():
+        if name not in baseline["timings"]:
+            continue
+        before, after = baseline["timings"][name]["median"], t["median"]
+        if before > 0 and after > before * (1 + tolerance):
+            regressions.append(f"{name}: {after * 1000:.3f}ms median, was {before * 1000:.3f}ms (+{(after / before - 1) * 100:.0f}%).")
+
+    for m, loaded in results.get("startup", {}).items():
+        new = [e for e in loaded if e not in baseline.get("startup", {}).get(m, [])]
+        if len(new) > 0:
+            regressions.append(f"import {m}: now loads {', '.join(new)}.")
+
+    q, b = results["quality"], baseline["quality"]
+    if q["mean_guesses"] > b["mean_guesses"]:
+        regressions.append(f"mean guesses: {q['mean_guesses']:.3f}, was {b['mean_guesses']:.3f}.")
+    if q["failures"] > b["failures"]:
+        regressions.append(f"failures: {q['failures']}, was {b['failures']}.")
+    return regressions
+
+
+def save_results(results, out_filename):
+    Path(out_filename).parent.mkdir(parents=True, exist_ok=True)
+    with open(out_filename, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or len([e for e in sys.argv if "help" in e.lower()]) > 0:
+        print("Usage: python benchmark.py out_file [baseline_file] [games] [strategy] [operation] [answers_file]")
+        print("Example: python benchmark.py ./cache/new.json ./cache/benchmark.json 200 avg_weighted sum")
+        print(f"Operations: {', '.join(OPERATIONS)}. Exits with 1 if the results regressed against the baseline.")
+    else:
+        results = run(read_answers(sys.argv[6] if len(sys.argv) > 6 else "./dictionaries/five-letter-words_sgb-words.txt"),
+                      games=int(sys.argv[3]) if len(sys.argv) > 3 else 200,
+                      strategy=sys.argv[4] if len(sys.argv) > 4 else None,
+                      operation=OPERATIONS[sys.argv[5]] if len(sys.argv) > 5 else sum)
+        save_results(results, sys.argv[1])
+        print(f"Saved results to {sys.argv[1]}.")
+
+        if len(sys.argv) > 2 and sys.argv[2] != "-" and Path(sys.argv[2]).exists():
+            regressions = compare(results, load_results(sys.argv[2]))
+            for e in regressions:
+                print(f"Regression - {e}")
+            if len(regressions) > 0:
+                sys.exit(1)
+            print(f"No regressions against {sys.argv[2]}.")
@@ -0,0 +1,343 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from find import RetryLater, WordValidator
+
+
+# Everything that drives the browser lives here, so the solver (wordle.py) only imports selenium - through this
+# module - once a game is actually played in the browser.
+
+
+WORDLE_URL = "https://www.nytimes.com/games/wordle/index.html"
+
+# Resolves with the data-state of every tile in a row (arguments[0]) once none of them are "tbd" or "empty", or
+# when arguments[1] ms have passed. A MutationObserver wakes it on every data-state change while the tiles flip, with a
+# check every arguments[2] ms as a fallback, so the whole wait is a single WebDriver round trip.
+WAIT_FOR_TILES_JS = """
+    const [row, timeout, pollInterval, done] = arguments;
+    const tiles = () => Array.from(row.querySelectorAll('div[class*=Tile-module_tile]'));
+    const states = () => tiles().map(e => e.getAttribute('data-state'));
+    let finished = false;
+    const finish = () => {
+        if (finished) return;
+        finished = true;
+        observer.disconnect();
+        clearInterval(interval);
+        clearTimeout(timer);
+        done(states());
+    };
+    const check = () => {
+        const s = states();
+        if (s.length > 0 && s.every(e => e !== 'tbd' && e !== 'empty')) finish();
+    };
+    const observer = new MutationObserver(check);
+    observer.observe(row, {subtree: true, attributes: true, attributeFilter: ['data-state']});
+    const interval = setInterval(check, pollInterval);
+    const timer = setTimeout(finish, timeout);
+    check();
+"""
+
+# Like WAIT_FOR_TILES_JS, but made for words that may not be in the game's word list: it also resolves, with
+# "invalid", as soon as the "Not in word list" toast shows up instead of waiting out the timeout. The toast of the
+# word before can still be on screen when the next one is typed, so every toast there is when the script finishes is
+# marked as seen and only unmarked toasts count as a verdict on the word just submitted.
+WAIT_FOR_VERDICT_JS = """
+    const [row, timeout, pollInterval, done] = arguments;
+    const states = () => Array.from(row.querySelectorAll('div[class*=Tile-module_tile]')).map(e => e.getAttribute('data-state'));
+    const toasts = () => Array.from(document.querySelectorAll('[class*=Toast-module_toast]'));
+    const rejected = () => toasts()
+        .some(e => !e.hasAttribute('data-verdict-seen') && e.textContent.toLowerCase().includes('not in word list'));
+    let finished = false;
+    const finish = (result) => {
+        if (finished) return;
+        finished = true;
+        observer.disconnect();
+        clearInterval(interval);
+        clearTimeout(timer);
+        toasts().forEach(e => e.setAttribute('data-verdict-seen', ''));
+        done(result);
+    };
+    const check = () => {
+        if (rejected()) return finish('invalid');
+        const s = states();
+        if (s.length > 0 && s.every(e => e !== 'tbd' && e !== 'empty')) finish(s);
+    };
+    const observer = new MutationObserver(check);
+    observer.observe(document.body, {subtree: true, childList: true, attributes: true, attributeFilter: ['data-state']});
+    const interval = setInterval(check, pollInterval);
+    const timer = setTimeout(() => finish(states()), timeout);
+    check();
+"""
+
+
+# a new headless chrome
+def new_driver(headless=True):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless')
+    return webdriver.Chrome(options=options)
+
+
+# opens the game page and clicks through the welcome screen and the help modal; returns (gameboard, body).
+# Waits for each element to show up rather than sleeping, so a page that is already warm in the browser cache opens
+# about as fast as chrome can render it.
+def open_game(driver, url=WORDLE_URL, timeout=10):
+    driver.get(url)
+    wait = WebDriverWait(driver, timeout)
+
+    buttons = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "button[class*=Welcome-module_button__]")))
+    for button in buttons:
+        if button.text.strip().lower() == "play":
+            button.click()
+            break
+
+    try:
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[class*=Modal-module_closeIcon"))).click()
+    except TimeoutException:
+        # no help modal, e.g. when it has already been seen
+        pass
+
+    gameboard = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[class*=Board-module_board]")))
+    body = driver.find_element(By.TAG_NAME, "body")
+    body.send_keys(Keys.RETURN)
+    return gameboard, body
+
+
+# forgets the played game so the next open_game starts on an empty board
+def reset_board(driver):
+    driver.delete_all_cookies()
+    driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+
+
+# types a word into the game and enters it
+def submit_word(body, word):
+    body.send_keys(word)
+    body.send_keys(Keys.RETURN)
+
+
+# deletes the last letters typed
+def erase_letters(body, letters):
+    for _ in range(letters):
+        body.send_keys(Keys.BACKSPACE)
+
+
+# the (1 indexed) row of tiles of the board
+def find_row(gameboard, row):
+    return gameboard.find_element(By.XPATH, f".//div[@aria-label='Row {row}']")
+
+
+# closes the game over modal and saves a screenshot of the board to filename
+def save_board(driver, gameboard, filename):
+    wait = WebDriverWait(driver, 10) # waits up to 10 seconds
+
+    close_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[class*=Modal-module_close]")))
+    actions = ActionChains(driver)
+    actions.move_to_element(close_button).click().perform()
+    close_button.click()
+
+    scroll_fn = f"""
+        let container = document.querySelector('div[class*=App-module_gameContainer__]');
+        container.scrollTop = container.scrollIntoView(true);
+    """
+
+    driver.execute_script(scroll_fn)
+
+    delete_toast_fn = """
+        // Use the ^= (starts with) operator to select any element whose ID begins with the stable part.
+        var element = document.querySelector('[id^="ToastContainer-module_gameToaster__"]');
+
+        // Check if the element was found before attempting to remove it.
+        if (element) {
+            element.remove();
+        }
+    """
+
+    driver.execute_script(delete_toast_fn)
+
+    time.sleep(1)
+    gameboard.find_element(By.XPATH, "../..").screenshot(filename)
+
+
+# Keeps warm chrome instances around so games don't pay for starting a browser. Drivers are created lazily up to
+# size, handed out with acquire() (or the session() context manager) and reset when they are released.
+#
+#   with DriverPool(size=2) as pool:
+#       for word in words:
+#           with Wordle(browser_game=True, pool=pool, ...) as game:
+#               game.play()
+class DriverPool:
+    def __init__(self, size=None, url=None, headless=None, factory=None):
+        if size is None:
+            size = 1
+        if url is None:
+            url = WORDLE_URL
+        if headless is None:
+            headless = True
+        if factory is None:
+            factory = lambda: new_driver(headless=headless)
+
+        self.size = size
+        self.url = url
+        self.factory = factory
+        # idle drivers, the last one released on top; _drivers also counts the ones handed out
+        self._idle = []
+        self._drivers = []
+        # drivers being started, which already take up a place in the pool
+        self._starting = 0
+        # guards all of the above; waited on by acquire() until a driver is released or dropped
+        self._changed = threading.Condition()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # a driver from the pool, starting one if none are idle and the pool isn't full; blocks otherwise, raising
+    # queue.Empty after timeout seconds
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while True:
+                if self.closed:
+                    raise RuntimeError("DriverPool is closed.")
+                if len(self._idle) > 0:
+                    return self._idle.pop()
+                if len(self._drivers) + self._starting < self.size:
+                    self._starting += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._changed.wait(remaining)
+
+        # started outside the lock, since starting a browser takes seconds
+        try:
+            driver = self.factory()
+        except BaseException:
+            with self._changed:
+                self._starting -= 1
+                self._changed.notify()
+            raise
+        with self._changed:
+            self._starting -= 1
+            closed = self.closed
+            if not closed:
+                self._drivers.append(driver)
+        if closed:
+            driver.quit()
+            raise RuntimeError("DriverPool is closed.")
+        return driver
+
+    # gives a driver back; it is reset for the next game, or dropped if it can't be. Either way a waiting acquire() is
+    # woken up, to take the driver or start a new one in its place.
+    def release(self, driver):
+        if self.closed:
+            driver.quit()
+            return
+        try:
+            reset_board(driver)
+        except Exception:
+            with self._changed:
+                if driver in self._drivers:
+                    self._drivers.remove(driver)
+                self._changed.notify()
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+        with self._changed:
+            self._idle.append(driver)
+            self._changed.notify()
+
+    # with pool.session() as driver: ...
+    @contextmanager
+    def session(self, timeout=None):
+        driver = self.acquire(timeout=timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        with self._changed:
+            self.closed = True
+            drivers, self._drivers, self._idle = self._drivers, [], []
+            self._changed.notify_all()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+# Checks words by typing them into the game, for crawling the list of words wordle accepts. Every worker thread
+# plays on its own driver from the pool; a word the game knows uses up a row, so the board is reopened once all six
+# are used or the word was the answer. A word the game doesn't know is deleted again.
+class WordleSiteValidator(WordValidator):
+    def __init__(self, pool, check_timeout=None, **kwargs):
+        if check_timeout is None:
+            check_timeout = 3
+        kwargs.setdefault("concurrency", pool.size)
+        # the game is local to the browser, so there is nothing to rate limit
+        kwargs.setdefault("rate", 0)
+        kwargs.setdefault("cache_file", "./cache/wordle_site_verdicts.json")
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.check_timeout = check_timeout
+        self.retry_on = (RetryLater, WebDriverException)
+        self._boards = threading.local()
+        self._drivers = []
+
+    # this thread's (driver, gameboard, body, next row number)
+    def _board(self, reopen=False):
+        board = getattr(self._boards, "board", None)
+        if board is None:
+            driver = self.pool.acquire()
+            self._drivers.append(driver)
+            # lookups always wait the same check_timeout, so the driver's script timeout is set once
+            driver.set_script_timeout(self.check_timeout + 5)
+            board = self._boards.board = [driver, None, None, 7]
+        if reopen or board[3] > 6:
+            reset_board(board[0])
+            board[1], board[2] = open_game(board[0], url=self.pool.url)
+            board[3] = 1
+        return board
+
+    def lookup(self, word):
+        board = self._board()
+        driver, gameboard, body, row = board
+        submit_word(body, word)
+
+        tiles = find_row(gameboard, row)
+        result = driver.execute_async_script(WAIT_FOR_VERDICT_JS, tiles, int(self.check_timeout * 1000), 100)
+        if result == "invalid" or "tbd" in result or "empty" in result:
+            erase_letters(body, len(word))
+            if result != "invalid":
+                # the tiles never settled; start over on a fresh board to be safe
+                self._board(reopen=True)
+                raise RetryLater(f"tiles did not settle ({result})")
+            return False
+
+        board[3] += 1
+        if all(e == "correct" for e in result):
+            board[3] = 7
+        return True
+
+    def close(self):
+        super().close()
+        drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            self.pool.release(driver)
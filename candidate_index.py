@@ -0,0 +1,94 @@
+import numpy as np
+
+
+# A precomputed index over a fixed list of words. Every set of words is stored as a packed bitset (a numpy uint8
+# array with one bit per word), so filtering on a guess result is a handful of AND/ANDNOT operations instead of a
+# chain of pandas string masks.
+#
+# position[i, l]: words with letter l at position i
+# present[l]: words that contain letter l
+# at_least[l, c]: words that contain letter l at least c + 1 times
+# counts[w, l]: how many times word w contains letter l
+class CandidateIndex:
+    def __init__(self, words):
+        self.words = np.array(list(words), dtype=object)
+        self.size = len(self.words)
+        self.width = max((len(w) for w in self.words), default=0)
+        self.ids_by_word = {w: i for i, w in enumerate(self.words)}
+        self.letters = {l: i for i, l in enumerate(sorted(set("".join(self.words))))}
+
+        # words as a (size x width) array of letter indices, -1 where a word is shorter than the width
+        self.encoded = np.full((self.size, self.width), -1, dtype=np.int16)
+        for i, w in enumerate(self.words):
+            self.encoded[i, :len(w)] = [self.letters[l] for l in w]
+
+        letters = np.arange(len(self.letters), dtype=np.int16)
+        # (width, letters, size) -> packed along the words axis
+        position = self.encoded.T[:, None, :] == letters[None, :, None]
+        counts = position.sum(axis=0)
+        self.counts = np.ascontiguousarray(counts.T, dtype=np.uint8)
+        self.position = np.packbits(position, axis=-1)
+        self.present = np.packbits(counts > 0, axis=-1)
+        self.at_least = np.packbits(counts[:, None, :] > np.arange(self.width)[None, :, None], axis=-1)
+        self.all = self.mask(np.arange(self.size))
+        self.none = np.zeros_like(self.all)
+
+    # a word as a row of letter indices like self.encoded; letters that aren't indexed never match anything
+    def encode(self, word):
+        row = np.full(self.width, -2, dtype=np.int16)
+        row[:len(word)] = [self.letters.get(l, -2) for l in word[:self.width]]
+        return row
+
+    # bitset of the given word ids
+    def mask(self, ids):
+        bits = np.zeros(self.size, dtype=bool)
+        bits[np.asarray(ids, dtype=np.int64)] = True
+        return np.packbits(bits)
+
+    # sorted word ids of a bitset
+    def ids(self, mask):
+        return np.flatnonzero(np.unpackbits(mask, count=self.size))
+
+    def count(self, mask):
+        return int(np.unpackbits(mask, count=self.size).sum())
+
+    # words with letter at position i
+    def at(self, i, letter):
+        l = self.letters.get(letter)
+        if l is None or i >= self.width:
+            return self.none
+        return self.position[i, l]
+
+    # words containing letter
+    def has(self, letter):
+        l = self.letters.get(letter)
+        return self.none if l is None else self.present[l]
+
+    # words containing letter at least n times
+    def has_at_least(self, letter, n):
+        if n <= 0:
+            return self.all
+        l = self.letters.get(letter)
+        if l is None or n > self.width:
+            return self.none
+        return self.at_least[l, n - 1]
+
+    # everything purge_mask uses of the answer, as a base 3 code like the feedback codes in patterns.py: 2 where the
+    # letters match, 1 where the answer has the letter elsewhere, 0 otherwise
+    @staticmethod
+    def purge_code(word, answer):
+        return sum((2 if word[i] == answer[i] else 1 if word[i] in answer else 0) * 3 ** i for i in range(len(word)))
+
+    # the same filter as Wordle.purge: a letter is present if the answer contains it anywhere
+    def purge_mask(self, word, answer):
+        if len(word) != self.width:
+            return self.none
+        mask = self.all.copy()
+        for i in range(len(word)):
+            if word[i] == answer[i]:
+                mask &= self.at(i, word[i])
+            elif word[i] in answer:
+                mask &= self.has(word[i]) & ~self.at(i, word[i])
+            else:
+                mask &= ~self.has(word[i])
+        return mask
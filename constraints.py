@@ -0,0 +1,86 @@
+from collections import Counter
+
+from patterns import code_results
+
+
+# Everything the feedback of a game has revealed about the answer:
+#   greens[i]: the letter at position i, if known
+#   banned[l]: positions letter l is known not to be at (yellow or grey tiles)
+#   min_count[l]: the answer has at least this many of letter l (its green and yellow tiles in one guess)
+#   max_count[l]: the answer has at most this many of letter l (set when one of its tiles in a guess is grey)
+# Repeated letters fall out of the counts: "spool" with one O green and the other grey means exactly one O, rather
+# than the O being both present and absent.
+#
+#   constraints = Constraints()
+#   constraints.update("spool", ["absent", "present", "absent", "correct", "absent"])
+#   constraints.allows("plonk")      # False, needs exactly one O at position 3
+#   game.keep(constraints.mask(game.index))
+class Constraints:
+    def __init__(self, width=5):
+        self.width = width
+        self.greens = [None] * width
+        self.banned = {}
+        self.min_count = {}
+        self.max_count = {}
+
+    # constraints of a single guess
+    @staticmethod
+    def from_results(word, results, width=5):
+        constraints = Constraints(width)
+        constraints.update(word, results)
+        return constraints
+
+    # adds the feedback of a guess: tile states ("correct"/"present"/"absent") or a feedback code, see patterns.py
+    def update(self, word, results):
+        if isinstance(results, int):
+            results = code_results(results, len(word))
+        found = Counter()
+        grey = set()
+        for i, (l, state) in enumerate(zip(word, results)):
+            if state == "correct":
+                self.greens[i] = l
+                found[l] += 1
+            elif state == "present":
+                self.banned.setdefault(l, set()).add(i)
+                found[l] += 1
+            else:
+                self.banned.setdefault(l, set()).add(i)
+                grey.add(l)
+
+        for l, n in found.items():
+            self.min_count[l] = max(self.min_count.get(l, 0), n)
+        for l in grey:
+            self.max_count[l] = min(self.max_count.get(l, self.width), found[l])
+
+    # could word still be the answer; one pass over its letters, whatever the size of the dictionary
+    def allows(self, word):
+        if len(word) != self.width:
+            return False
+        counts = Counter(word)
+        for i, l in enumerate(word):
+            if self.greens[i] is not None and self.greens[i] != l:
+                return False
+            if i in self.banned.get(l, ()):
+                return False
+        for l, n in self.min_count.items():
+            if counts[l] < n:
+                return False
+        for l, n in self.max_count.items():
+            if counts[l] > n:
+                return False
+        return True
+
+    # bitset of the words of a CandidateIndex that are allowed
+    def mask(self, index):
+        mask = index.all.copy()
+        for i, l in enumerate(self.greens):
+            if l is not None:
+                mask &= index.at(i, l)
+        for l, positions in self.banned.items():
+            for i in positions:
+                mask &= ~index.at(i, l)
+        for l, n in self.min_count.items():
+            mask &= index.has_at_least(l, n)
+        for l, n in self.max_count.items():
+            mask &= ~index.has_at_least(l, n + 1)
+        return mask
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import string
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+from ingest import read_words
+
+
+# Crawling the list of words a word game accepts one letter combination at a time: candidates come from a generator,
+# most of the 26 ** n combinations are never tried because no known word has their letter pairs, the rest are checked
+# by a validator (see find.WordValidator) and the crawl can be stopped and resumed at any point.
+#
+#   with DriverPool(size=4) as pool, WordleSiteValidator(pool, remember=False) as validator:
+#       crawl("./dictionaries/wordle_words.txt", validator, plausible_words(known_words(DICTIONARIES)))
+
+
+VOWELS = set("aeiouy")
+
+
+# the normalized words of length num_of_letters in the files, streamed a line at a time (see ingest.read_words)
+def known_words(paths, num_of_letters=5):
+    for path in paths:
+        yield from read_words(path, num_of_letters)
+
+
+# For every position, the letters words start with and the letters that follow each letter at that position in the
+# known words. A combination is plausible if every one of its letter pairs was seen at the same position.
+class BigramModel:
+    def __init__(self, words, num_of_letters=5):
+        self.num_of_letters = num_of_letters
+        self.first = set()
+        self.follows = [{} for _ in range(num_of_letters - 1)]
+        for w in words:
+            self.first.add(w[0])
+            for i in range(num_of_letters - 1):
+                self.follows[i].setdefault(w[i], set()).add(w[i + 1])
+
+    def is_plausible(self, word):
+        if len(word) != self.num_of_letters or word[0] not in self.first or VOWELS.isdisjoint(word):
+            return False
+        return all(word[i + 1] in self.follows[i].get(word[i], ()) for i in range(self.num_of_letters - 1))
+
+    # every plausible combination in alphabetical order, without ever holding more than one of them
+    def candidates(self):
+        n = self.num_of_letters
+
+        def walk(prefix):
+            if len(prefix) == n:
+                if not VOWELS.isdisjoint(prefix):
+                    yield prefix
+                return
+            for c in sorted(self.follows[len(prefix) - 1].get(prefix[-1], ())):
+                yield from walk(prefix + c)
+
+        for c in sorted(self.first):
+            yield from walk(c)
+
+
+# plausible combinations of num_of_letters letters given the known words, or every combination without them
+def plausible_words(words=None, num_of_letters=5):
+    if words is None:
+        return all_words(num_of_letters)
+    return BigramModel(words, num_of_letters).candidates()
+
+
+# every combination of num_of_letters letters in alphabetical order
+def all_words(num_of_letters=5):
+    def walk(prefix):
+        if len(prefix) == num_of_letters:
+            yield prefix
+            return
+        for c in string.ascii_lowercase:
+            yield from walk(prefix + c)
+    return walk("")
+
+
+def load_checkpoint(checkpoint_file):
+    if checkpoint_file is None or not Path(checkpoint_file).exists():
+        return {"position": 0, "checked": 0, "found": 0}
+    with open(checkpoint_file) as f:
+        return json.load(f)
+
+
+def save_checkpoint(checkpoint, checkpoint_file):
+    tmp = Path(checkpoint_file).with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    tmp.replace(checkpoint_file)
+
+
+# Checks the candidates with the validator and appends the words it accepts to out_filename, returning the set of
+# words in it. Candidates must come in the same order every run: checkpoint_file (out_filename + ".checkpoint" by
+# default) records how many of them are done, so a crawl that is stopped or crashes carries on from there. Only
+# candidates whose check is still running are kept around, so memory stays flat however many there are. Words that
+# could not be checked (the validator gave up on them) go to out_filename + ".failed".
+def crawl(out_filename, validator, candidates, checkpoint_file=None, print_statements=True, report_every=10):
+    if checkpoint_file is None:
+        checkpoint_file = f"{out_filename}.checkpoint"
+    checkpoint = load_checkpoint(checkpoint_file)
+    position = checkpoint["position"]
+
+    found = set()
+    if Path(out_filename).exists():
+        with open(out_filename) as f:
+            found = {line.strip() for line in f if line.strip() != ""}
+    if print_statements and position > 0:
+        print(f"Resuming after {position} candidates with {len(found)} words.")
+
+    # candidate -> its position, for candidates being checked
+    pending = {}
+    # positions that are done but come after one that isn't yet
+    done = set()
+
+    def feed():
+        for i, w in enumerate(islice(candidates, position, None), start=position):
+            pending[w] = i
+            yield w
+
+    async def run():
+        nonlocal position
+        # checked counts the lookups of this run, for the rate. Only the candidates before position are known to be
+        # done - the ones finished past it are checked again after a crash - so position is what the totals count.
+        start, checked, s, last = position, 0, time.time(), time.time()
+        with open(out_filename, "a") as out, open(f"{out_filename}.failed", "a") as failed:
+            async for word, verdict in validator.stream(feed()):
+                done.add(pending.pop(word))
+                while position in done:
+                    done.remove(position)
+                    position += 1
+                checked += 1
+
+                if verdict is None:
+                    failed.write(f"{word}\n")
+                elif verdict and word not in found:
+                    found.add(word)
+                    out.write(f"{word}\n")
+
+                if time.time() - last >= report_every:
+                    last = time.time()
+                    out.flush()
+                    failed.flush()
+                    save_checkpoint({"position": position, "checked": position, "found": len(found)}, checkpoint_file)
+                    if print_statements:
+                        print(f"{checked / (last - s):.1f} words/s, {position} candidates done, {len(found)} words.")
+
+        save_checkpoint({"position": position, "checked": position, "found": len(found)}, checkpoint_file)
+        if print_statements:
+            elapsed = time.time() - s
+            print(f"Checked {position - start} candidates in {elapsed:.1f}s ({checked / max(elapsed, 1e-9):.1f} words/s), "
+                  f"{position} in all, {len(found)} words.")
+
+    asyncio.run(run())
+    return found
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or len([e for e in sys.argv if "help" in e.lower()]) > 0:
+        print("Usage: python crawl.py out_file [drivers] [num_of_letters]")
+        print("Crawls the words the wordle website accepts into out_file; run it again to resume.")
+    else:
+        from wordle import Wordle
+
+        Wordle.build_dictionary_from_wordle_website(sys.argv[1],
+                                                    drivers=int(sys.argv[2]) if len(sys.argv) > 2 else None,
+                                                    num_of_letters=int(sys.argv[3]) if len(sys.argv) > 3 else 5)
@@ -1,70 +1,358 @@
-from bs4 import BeautifulSoup
-import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from itertools import permutations
 from math import perm
+from pathlib import Path
 import sys
 import asyncio
-import pandas as pd
+import json
+import threading
+import time
+
+from ingest import ingest_file
+
+
+MERRIAM_WEBSTER_URL = "https://www.merriam-webster.com/dictionary/{}"
+
+# pandas, bs4 and requests are imported where they are used: pattern queries against a dictionary never load the
+# online lookup's dependencies.
 
 
 def create_dictionary(dictionary):
-    df = pd.read_csv(dictionary, header=None)
-    df = df.loc[df[0].str.len() == 5]
-    df[0] = df[0].str.lower()
-    return df
+    import pandas as pd
+
+    return pd.DataFrame({0: pd.Series(ingest_file(dictionary), dtype=object)})
+
+
+# A trie over a dictionary for "__e__" + available letters queries. query() walks only prefixes that exist in the
+# dictionary and streams matches, instead of building every permutation of the available letters.
+class WordTrie:
+    # marks the end of a word in a node
+    END = ""
+
+    def __init__(self, words=None):
+        self.root = {}
+        self.size = 0
+        if words is not None:
+            for w in words:
+                self.add(w)
+
+    @staticmethod
+    def from_dictionary(dictionary):
+        if isinstance(dictionary, WordTrie):
+            return dictionary
+        # without pandas loaded dictionary can't be a frame
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(dictionary, pd.DataFrame):
+            dictionary = dictionary[0]
+        return WordTrie(dictionary)
+
+    def add(self, word):
+        node = self.root
+        for c in word:
+            node = node.setdefault(c, {})
+        if WordTrie.END not in node:
+            node[WordTrie.END] = word
+            self.size += 1
+
+    def __contains__(self, word):
+        node = self.root
+        for c in word:
+            node = node.get(c)
+            if node is None:
+                return False
+        return WordTrie.END in node
+
+    # words matching the pattern, where every "_" is filled with one of the available characters (each one used at
+    # most as often as it is given, like the permutations combos used to check)
+    def query(self, pattern, chars_available):
+        available = Counter(chars_available)
+
+        def walk(node, i):
+            if i == len(pattern):
+                if WordTrie.END in node:
+                    yield node[WordTrie.END]
+                return
+            if pattern[i] != "_":
+                if pattern[i] in node:
+                    yield from walk(node[pattern[i]], i + 1)
+                return
+            for c in sorted(available):
+                if available[c] > 0 and c in node:
+                    available[c] -= 1
+                    yield from walk(node[c], i + 1)
+                    available[c] += 1
+
+        return walk(self.root, 0)
+
+
+# streams the dictionary words matching a pattern, see WordTrie.query. dictionary can be a WordTrie (reuse one for
+# many queries), a data frame from create_dictionary or any iterable of words.
+def find_words(pattern, chars_available, dictionary):
+    return WordTrie.from_dictionary(dictionary).query(pattern.lower(), chars_available.lower())
+
+
+# is the merriam-webster page for a word a dictionary entry
+def merriam_webster_is_word(response):
+    from bs4 import BeautifulSoup
+
+    if response.status_code == 404:
+        return False
+    bs = BeautifulSoup(response.content, "html.parser")
+    return len(bs.find_all("h1", class_="hword")) > 0
+
+
+# raised by WordValidator.lookup when a word should be tried again, after delay seconds if given
+class RetryLater(Exception):
+    def __init__(self, message, delay=None):
+        super().__init__(message)
+        self.delay = delay
+
 
+# Checks words against an online dictionary without getting blocked:
+#   - at most concurrency requests in flight, over reused keep-alive connections (one requests.Session per thread)
+#   - at most rate requests per second overall
+#   - only 200 and 404 responses are verdicts; connection errors and every other status (429, 5xx, 403 block pages)
+#     are retried with exponential backoff, honoring Retry-After, and a word that never got a verdict isn't cached
+#   - every verdict is saved to cache_file, so no word is ever looked up twice, across runs too (remember=False keeps
+#     no verdicts at all, for crawls too big to hold in memory)
+# url is a format string for the word's page and is_word(response) decides the verdict; point url at a local stub
+# server to test it.
+class WordValidator:
+    def __init__(
+        self,
+        url=None,
+        is_word=None,
+        concurrency=None,
+        rate=None,
+        retries=None,
+        backoff=None,
+        timeout=None,
+        cache_file=None,
+        print_statements=None,
+        remember=None
+    ):
+        if url is None:
+            url = MERRIAM_WEBSTER_URL
+        if is_word is None:
+            is_word = merriam_webster_is_word
+        if concurrency is None:
+            concurrency = 4
+        if rate is None:
+            rate = 2
+        if retries is None:
+            retries = 3
+        if backoff is None:
+            backoff = 1
+        if timeout is None:
+            timeout = 10
+        if cache_file is None:
+            cache_file = "./cache/word_verdicts.json"
+        if print_statements is None:
+            print_statements = False
+        if remember is None:
+            remember = True
+        import requests
+
+        self.url = url
+        self.is_word = is_word
+        self.concurrency = concurrency
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache_file = cache_file
+        self.print_statements = print_statements
+        self.remember = remember
+        # errors lookup can raise that are worth retrying
+        self.retry_on = (RetryLater, requests.RequestException)
+
+        self.cache = {}
+        if remember and cache_file and Path(cache_file).exists():
+            with open(cache_file) as f:
+                self.cache = json.load(f)
+        self._unsaved = 0
+        self._sessions = threading.local()
+        self._executor = None
+        self._next_request = 0
+        self._rate_lock = None
+        self._loop = None
+        self.requests = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.save()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    # writes the verdicts to cache_file
+    def save(self):
+        if not self.cache_file or self._unsaved == 0:
+            return
+        Path(self.cache_file).parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(self.cache_file).with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.cache, f)
+        tmp.replace(self.cache_file)
+        self._unsaved = 0
+
+    # verdict for one word, run on a worker thread; raises RetryLater (or a connection error) to be retried.
+    # Subclasses can check words some other way by overriding this.
+    def lookup(self, word):
+        session = getattr(self._sessions, "session", None)
+        if session is None:
+            import requests
+
+            session = self._sessions.session = requests.Session()
+        response = session.get(self.url.format(word), timeout=self.timeout)
+        # only a page or a missing page is a verdict; anything else (429, 5xx, a 403 block page, ...) is retried and
+        # never cached
+        if response.status_code not in (200, 404):
+            retry_after = response.headers.get("Retry-After", "")
+            raise RetryLater(f"status {response.status_code}", float(retry_after) if retry_after.isdigit() else None)
+        return self.is_word(response)
+
+    # waits for the next request slot allowed by rate
+    async def _throttle(self):
+        if self.rate is None or self.rate <= 0:
+            return
+        async with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request - now
+            self._next_request = max(now, self._next_request) + 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    # True/False for a word, or None if it couldn't be checked after all retries
+    async def check(self, word):
+        if word in self.cache:
+            return self.cache[word]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        if self._rate_lock is None or self._loop is not asyncio.get_running_loop():
+            self._loop = asyncio.get_running_loop()
+            self._rate_lock = asyncio.Lock()
+
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            await self._throttle()
+            delay = self.backoff * 2 ** attempt
+            try:
+                self.requests += 1
+                verdict = await loop.run_in_executor(self._executor, self.lookup, word)
+            except self.retry_on as e:
+                if isinstance(e, RetryLater) and e.delay is not None:
+                    delay = e.delay
+                # no point waiting after the last attempt
+                if attempt < self.retries:
+                    if self.print_statements:
+                        print(f"{word}: {e}, retrying in {delay}s.")
+                    await asyncio.sleep(delay)
+                elif self.print_statements:
+                    print(f"{word}: {e}, giving up.")
+                continue
+
+            if self.remember:
+                self.cache[word] = verdict
+                self._unsaved += 1
+                if self._unsaved >= 100:
+                    self.save()
+            if verdict and self.print_statements:
+                print(f"{word} is a word!")
+            return verdict
+        return None
+
+    # async generator of (word, verdict) for an iterable of words, in completion order. Words are pulled from the
+    # iterable only as slots free up, so it can be a lazy generator of any length. A word that comes up again while it
+    # is still being looked up is skipped, so it is neither requested nor yielded twice.
+    async def stream(self, words):
+        words = iter(words)
+        pending = set()
+        # word -> its lookup task, until the task is done
+        in_flight = {}
+        while True:
+            while len(pending) < self.concurrency * 2:
+                word = next(words, None)
+                if word is None:
+                    break
+                if word in in_flight:
+                    continue
+                if word in self.cache:
+                    yield word, self.cache[word]
+                    continue
+                task = in_flight[word] = asyncio.ensure_future(self._check_pair(word))
+                pending.add(task)
+            if len(pending) == 0:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                word, verdict = task.result()
+                del in_flight[word]
+                yield word, verdict
+
+    async def _check_pair(self, word):
+        return word, await self.check(word)
+
+    # the valid words of an iterable, in completion order
+    def valid_words(self, words):
+        async def collect():
+            return [w async for w, verdict in self.stream(words) if verdict]
+
+        try:
+            return asyncio.run(collect())
+        finally:
+            self.save()
+
+
+# dictionary words that fit a pattern like "__e__" using the available characters. Without a dictionary every
+# permutation is checked online through validator (a WordValidator by default).
+def combos(pattern, chars_available, print_statements=False, dictionary=None, validator=None):
+    if dictionary is not None:
+        words = list(find_words(pattern, chars_available, dictionary))
+        if print_statements:
+            print("Finished.")
+        return words
 
-def combos(pattern, chars_available, print_statements=False, dictionary=None):
-    loop = asyncio.new_event_loop()
-    #loop = asyncio.get_running_loop()
-    words = []
     p = len([c for c in pattern if c == "_"])
     template = pattern.replace("_", "%c")
     letter_combos = permutations(chars_available, p)
     if print_statements:
         print(f"Working on computing {(pc:=perm(len(chars_available), p))} permutation{'s' if pc > 1 else ''}...")
 
-    async def check_word(w, ps, d=None):
-        if d is None:
-            c = requests.get(f"https://www.merriam-webster.com/dictionary/{w}")
-            if c is not None:
-                bs = BeautifulSoup(c.content, "html.parser")
-                if len(bs.find_all("h1", class_="hword")) > 0:
-                    if ps:
-                        print(f"{w} is a word!")
-                    return w
-        elif isinstance(d, pd.core.frame.DataFrame):
-            if not d.loc[d[0] == w].empty:
-                return w
-        return None
+    if validator is None:
+        validator = WordValidator(print_statements=print_statements)
 
-    if dictionary is None:
+    # permutations of repeated characters give the same word more than once
+    def candidates():
+        seen = set()
         for i, combo in enumerate(letter_combos):
             if i % 1000 == 0 and i > 0 and print_statements:
                 print(f"Searched {i} combinations.")
             word = template % combo
-            if word is not None:
-                response = asyncio.run(check_word(word, print_statements))
-                if response is not None:
-                    words.append(response)
-    elif isinstance(dictionary, pd.core.frame.DataFrame):
-        perms = [template % e for e in letter_combos]
-        words = dictionary.loc[dictionary[0].isin(perms)][0].tolist()
-
-    loop.close()
+            if word not in seen:
+                seen.add(word)
+                yield word
+
+    words = validator.valid_words(candidates())
     if print_statements:
         print("Finished.")
     return words
 
-
 if __name__ == "__main__":
     # help menu
     if len([e for e in sys.argv if "help" in e.lower()]) > 0:
-        print("Usage: python find.py pattern available_characters")
-        print("Example: python find.py __e__ abdknpo")
-        print("Disclaimer: this uses http to check for words, so naturally it is slow.")
+        print("Usage: python find.py pattern available_characters [dictionary_file]")
+        print("Example: python find.py __e__ abdknpo ./dictionaries/english3.txt")
+        print("Disclaimer: without a dictionary file this uses http to check for words, so naturally it is slow.")
     else:
         if len(sys.argv) == 3:
-            combos(sys.argv[1], sys.argv[2])
+            print("\n".join(combos(sys.argv[1], sys.argv[2])))
         if len(sys.argv) == 4:
-            combos(sys.argv[1], sys.argv[2])
+            for word in find_words(sys.argv[1], sys.argv[2], ingest_file(sys.argv[3])):
+                print(word)
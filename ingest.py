@@ -0,0 +1,193 @@
+import os
+import re
+import sys
+import time
+import unicodedata
+
+
+# Reads word lists of any size a line at a time, so memory grows with the words kept and never with the file:
+#   - the word is the first field of a line (fields are separated by whitespace or commas), an optional frequency
+#     the second; lines are utf-8, or latin-1 where they aren't valid utf-8
+#   - words are lowercased and stripped of accents ("Abbé" -> "abbe"), and dropped unless they're only letters a-z
+#   - lines of the wrong length are dropped before any of that when they can be
+#   - duplicates are dropped as they come, keeping the first; with frequencies, the counts of a word are added up
+# Files are read in parallel worker processes, each sending back only the words it kept.
+#
+#   words = ingest(DICTIONARIES)                                       # ["aahed", "aalii", ...]
+#   counts = ingest(["./corpus.tsv"], frequency=True)                  # {"about": 1226734, ...}
+
+
+# version of the rules above; part of the compiled store key, see word_store.store_key. The pattern matrix and opening
+# books are keyed by the ingested words themselves, see WordStore.words_hash
+INGEST_VERSION = 1
+
+# what separates the fields of a line
+FIELDS = re.compile(r"[\s,]+")
+BYTE_FIELDS = re.compile(rb"[\s,]+")
+
+# bytes of lines read at a time
+CHUNK_BYTES = 1 << 20
+
+
+# decodes a line of bytes, falling back to latin-1 for lines that aren't utf-8
+def decode(line):
+    try:
+        return line.decode("utf-8")
+    except UnicodeDecodeError:
+        return line.decode("latin-1")
+
+
+# lowercased word with its accents stripped, or None if it isn't only letters a-z
+def normalize(word):
+    word = word.lower()
+    if not word.isascii():
+        word = "".join(c for c in unicodedata.normalize("NFKD", word) if not unicodedata.combining(c))
+        if not word.isascii():
+            return None
+    return word if word.isalpha() else None
+
+
+# (word, frequency) of a line of bytes, or None if it has no word of the length (any length if None). frequency is
+# None unless asked for, 1 if the line doesn't have one. Plain ascii lines are checked for their length before they
+# are decoded or split any further, since most lines of a big list are thrown away there.
+def parse_line(line, length=None, frequency=False):
+    line = line.strip()
+    # a line never has fewer bytes than its word has letters
+    if line == b"" or (length is not None and len(line) < length):
+        return None
+    if line.isascii():
+        if frequency:
+            fields = BYTE_FIELDS.split(line, 2)
+        else:
+            # the same first field as BYTE_FIELDS would give, without a regex
+            fields = line.split(None, 1)[:1]
+            if b"," in fields[0]:
+                fields = fields[0].split(b",", 1)[:1]
+        # an ascii word keeps its length
+        if length is not None and len(fields[0]) != length:
+            return None
+        fields = [e.decode("ascii") for e in fields]
+    else:
+        fields = FIELDS.split(decode(line).strip("\ufeff"), 2 if frequency else 1)
+    word = normalize(fields[0])
+    if word is None or (length is not None and len(word) != length):
+        return None
+    if not frequency:
+        return word, None
+    if len(fields) < 2 or fields[1] == "":
+        return word, 1
+    try:
+        return word, int(fields[1])
+    except ValueError:
+        pass
+    try:
+        return word, float(fields[1])
+    except ValueError:
+        return None
+
+
+# streams the normalized words of a file, or (word, frequency) pairs, duplicates included. The file is read in
+# chunks of about CHUNK_BYTES of whole lines, and lines that can't hold a word of the length - too short, or a single
+# ascii field of another length - are dropped a chunk at a time before parse_line sees them.
+def read_words(path, length=5, frequency=False):
+    with open(path, "rb") as f:
+        while len(lines := f.readlines(CHUNK_BYTES)) > 0:
+            if length is not None:
+                lines = [e for e in map(bytes.strip, lines) if len(e) == length or (len(e) > length and (
+                    not e.isascii() or b"," in e or len(e.split(None, 1)) > 1))]
+            for line in lines:
+                parsed = parse_line(line, length, frequency)
+                if parsed is not None:
+                    yield parsed if frequency else parsed[0]
+
+
+# the distinct words of one file in the order they first appear, or {word: total frequency}
+def ingest_file(path, length=5, frequency=False):
+    if frequency:
+        counts = {}
+        for w, n in read_words(path, length, frequency=True):
+            counts[w] = counts.get(w, 0) + n
+        return counts
+    seen = set()
+    words = []
+    for w in read_words(path, length):
+        if w not in seen:
+            seen.add(w)
+            words.append(w)
+    return words
+
+
+def _ingest_file(args):
+    return ingest_file(*args)
+
+
+# The distinct words of all the files, in the order they first appear going through the files in order, or with
+# frequency a {word: frequency} dict with the frequencies of every file added up. Files are ingested by up to workers
+# processes (by default one per core, at most one per file); workers=1 reads them one after the other in this process.
+def ingest(paths, length=5, frequency=False, workers=None, print_statements=False):
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+    if workers > 1:
+        # only imported when there's more than one file to read, to keep short lived starts fast
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # a daemonic worker (e.g. of a multiprocessing.Pool) can't start processes of its own
+        if multiprocessing.current_process().daemon:
+            workers = 1
+    s = time.time()
+
+    jobs = [(p, length, frequency) for p in paths]
+    if workers == 1:
+        parts = map(_ingest_file, jobs)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        parts = executor.map(_ingest_file, jobs)
+
+    try:
+        if frequency:
+            merged = {}
+            for part in parts:
+                for w, n in part.items():
+                    merged[w] = merged.get(w, 0) + n
+        else:
+            merged = []
+            seen = set()
+            for part in parts:
+                for w in part:
+                    if w not in seen:
+                        seen.add(w)
+                        merged.append(w)
+    finally:
+        if workers > 1:
+            executor.shutdown()
+
+    if print_statements:
+        print(f"Ingested {len(merged)} words from {len(paths)} files in {time.time() - s:.2f}s.")
+    return merged
+
+
+# writes words, or a {word: frequency} dict as tab separated lines, to out_filename
+def write_words(words, out_filename):
+    with open(out_filename, "w") as f:
+        if isinstance(words, dict):
+            for w, n in words.items():
+                f.write(f"{w}\t{n}\n")
+        else:
+            for w in words:
+                f.write(f"{w}\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or len([e for e in sys.argv if "help" in e.lower()]) > 0:
+        print("Usage: python ingest.py out_file dictionary_file [dictionary_file ...] [--length=5] [--frequency]")
+        print("Example: python ingest.py ./dictionaries/merged.txt ./dictionaries/english3.txt ./dictionaries/usa.txt")
+    else:
+        options = [e for e in sys.argv[2:] if e.startswith("--")]
+        length = next((int(e.split("=")[1]) for e in options if e.startswith("--length=")), 5)
+        words = ingest([e for e in sys.argv[2:] if not e.startswith("--")], length=length or None,
+                       frequency="--frequency" in options, print_statements=True)
+        write_words(words, sys.argv[1])
+        print(f"Saved {len(words)} words to {sys.argv[1]}.")
@@ -0,0 +1,132 @@
+import csv
+import json
+import statistics
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+
+# Timings and counters of what a game spends its time on, e.g. whether a slow browser game waited on chrome (check)
+# or on the solver (purge, select_word). Pass one to Wordle(metrics=...); games without one record into NULL_METRICS,
+# which does nothing. One Metrics can be shared by any number of games played one after the other.
+#
+#   metrics = Metrics()
+#   Wordle(..., metrics=metrics).play()
+#   metrics.to_json("./cache/metrics.json")
+#
+# Everything is kept as a list of events (game, guess, kind, name, value, at) with kind one of "timing" (seconds),
+# "count" or "value" (e.g. the number of candidates before a guess); summary() aggregates them by name.
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics.time(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    enabled = True
+    FIELDS = ("game", "guess", "kind", "name", "value", "at")
+
+    def __init__(self):
+        self.events = []
+        # number of the game being played and its guess number, set by the game
+        self.game = 0
+        self.guess = 0
+        self._start = time.perf_counter()
+
+    # with metrics.timer("purge"): ...
+    def timer(self, name):
+        return _Timer(self, name)
+
+    def time(self, name, seconds):
+        self._add("timing", name, seconds)
+
+    def count(self, name, n=1):
+        self._add("count", name, n)
+
+    def record(self, name, value):
+        self._add("value", name, value)
+
+    def start_game(self):
+        self.game += 1
+        self.guess = 0
+
+    def set_guess(self, guess):
+        self.guess = guess
+
+    def _add(self, kind, name, value):
+        self.events.append((self.game, self.guess, kind, name, value, time.perf_counter() - self._start))
+
+    # per name: count, total, mean and max seconds of timings, totals of counts, and count, mean, min and max of values
+    def summary(self):
+        grouped = {}
+        for game, guess, kind, name, value, at in self.events:
+            grouped.setdefault((kind, name), []).append(value)
+
+        summary = {"timings": {}, "counts": {}, "values": {}}
+        for (kind, name), values in sorted(grouped.items()):
+            if kind == "timing":
+                summary["timings"][name] = {"count": len(values), "total": sum(values), "mean": statistics.fmean(values), "max": max(values)}
+            elif kind == "count":
+                summary["counts"][name] = sum(values)
+            else:
+                summary["values"][name] = {"count": len(values), "mean": statistics.fmean(values), "min": min(values), "max": max(values)}
+        return summary
+
+    # the summary and every event as a dict, also written to filename if given
+    def to_json(self, filename=None):
+        data = {
+            "games": self.game,
+            "summary": self.summary(),
+            "events": [dict(zip(self.FIELDS, e)) for e in self.events],
+        }
+        if filename is not None:
+            Path(filename).parent.mkdir(parents=True, exist_ok=True)
+            with open(filename, "w") as f:
+                json.dump(data, f, indent=2)
+        return data
+
+    # every event as a row of a csv file
+    def to_csv(self, filename):
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.FIELDS)
+            writer.writerows(self.events)
+
+
+# records nothing; every call is a no-op so games without metrics don't pay for them
+class NullMetrics:
+    enabled = False
+    _timer = nullcontext()
+
+    def timer(self, name):
+        return self._timer
+
+    def time(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def record(self, name, value):
+        pass
+
+    def start_game(self):
+        pass
+
+    def set_guess(self, guess):
+        pass
+
+
+NULL_METRICS = NullMetrics()
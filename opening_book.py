@@ -0,0 +1,114 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from patterns import ALL_CORRECT, array_hash
+
+
+# An opening book maps the feedback codes seen so far to the next word the strategy would guess, e.g.
+#   {"": "tares", "80": "colin", "80,24": "bunch", ...}
+# The first guess is fixed, so every early position of a game is decided by its path of feedback codes alone and can
+# be worked out offline. Wordle(opening_book=...) loads the file and only computes live once a game leaves the book.
+
+
+# key of a path of feedback codes
+def book_key(codes):
+    return ",".join(str(e) for e in codes)
+
+
+# name a strategy is saved under
+def strategy_name(strategy):
+    if hasattr(strategy, "criterion"):
+        return strategy.criterion
+    return getattr(strategy, "__name__", type(strategy).__name__)
+
+
+# walks the feedback pattern tree of the game's dictionary from its starting word down to depth guesses and records
+# the word the game's strategy picks at every position. Positions are narrowed down with Wordle.pattern_purge.
+def build_opening_book(game, depth=2, print_statements=True):
+    saved = game.candidates, game.guesses, game.history, game.book
+    game.book = None
+    book = {book_key([]): game.starting_guess_word}
+    s = time.time()
+
+    def walk(ids, word, codes):
+        for code in np.unique(game.pattern_row(word)[ids]):
+            if code == ALL_CORRECT:
+                continue
+            path = codes + [int(code)]
+            game.candidates = ids
+            game.candidates = children = game.pattern_purge(word, code)
+            game.guesses = len(path)
+            game.history = game.history[:len(codes)] + [word]
+            w = game.select_word()
+            if w == "":
+                continue
+            book[book_key(path)] = w
+            if len(path) < depth:
+                walk(children, w, path)
+        if print_statements and len(codes) == 0:
+            print(f"Built {len(book)} positions in {time.time() - s:.1f}s.")
+
+    try:
+        game.history = []
+        walk(np.arange(game.index.size), game.starting_guess_word, [])
+    finally:
+        game.candidates, game.guesses, game.history, game.book = saved
+
+    return {
+        "dictionary": game.store.words_hash,
+        "strategy": strategy_name(game.strategy),
+        "operation": strategy_name(game.operation),
+        "weights": array_hash(game.store.weights),
+        "starting_guess_word": game.starting_guess_word,
+        "depth": depth,
+        "book": book,
+    }
+
+
+def save_opening_book(book, out_filename):
+    Path(out_filename).parent.mkdir(parents=True, exist_ok=True)
+    with open(out_filename, "w") as f:
+        json.dump(book, f, separators=(",", ":"))
+
+
+# loads a book for the game, or None if it was built for another dictionary, strategy, weighting or starting word
+def load_opening_book(filename, game):
+    with open(filename) as f:
+        book = json.load(f)
+    if book["dictionary"] != game.store.words_hash:
+        if game.print_statements:
+            print(f"Opening book {filename} was built for other words; ignoring it.")
+        return None
+    if book.get("strategy") != strategy_name(game.strategy):
+        if game.print_statements:
+            print(f"Opening book {filename} was built for the {book.get('strategy')} strategy, not {strategy_name(game.strategy)}; ignoring it.")
+        return None
+    # the operation is checked by the weights it gave, which also covers the dist file and weight model settings
+    if book.get("weights") != array_hash(game.store.weights):
+        if game.print_statements:
+            print(f"Opening book {filename} was built with other word weights ({book.get('operation')}, not {strategy_name(game.operation)}); ignoring it.")
+        return None
+    if game.starting_guess_word is not None and book["starting_guess_word"] != game.starting_guess_word:
+        if game.print_statements:
+            print(f"Opening book {filename} starts with {book['starting_guess_word']}, not {game.starting_guess_word}; ignoring it.")
+        return None
+    return book
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or len([e for e in sys.argv if "help" in e.lower()]) > 0:
+        print("Usage: python opening_book.py out_file [depth] [strategy] [starting_guess_word]")
+        print("Example: python opening_book.py ./cache/book_entropy.json 2 entropy tares")
+    else:
+        from wordle import Wordle, DICTIONARIES
+
+        game = Wordle(dictionary=DICTIONARIES, browser_game=False, print_statements=True,
+                      strategy=sys.argv[3] if len(sys.argv) > 3 else None,
+                      starting_guess_word=sys.argv[4] if len(sys.argv) > 4 else None)
+        book = build_opening_book(game, depth=int(sys.argv[2]) if len(sys.argv) > 2 else 2)
+        save_opening_book(book, sys.argv[1])
+        print(f"Saved {len(book['book'])} positions to {sys.argv[1]}.")
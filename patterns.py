@@ -0,0 +1,98 @@
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+
+# tile states are encoded as base 3 digits, the first letter being the least significant digit:
+# absent = 0, present = 1, correct = 2. A full row is a number in [0, 3 ** 5).
+STATES = {"absent": 0, "present": 1, "correct": 2}
+ALL_CORRECT = 3 ** 5 - 1
+
+
+# feedback code of a guess against an answer with wordle's rules for repeated letters
+def pattern(guess, answer):
+    code = 0
+    remaining = [answer[i] for i in range(len(answer)) if guess[i] != answer[i]]
+    for i in range(len(guess)):
+        if guess[i] == answer[i]:
+            code += 2 * 3 ** i
+        elif guess[i] in remaining:
+            code += 3 ** i
+            remaining.remove(guess[i])
+    return code
+
+
+# feedback code of a row of tile states read from the browser
+def results_code(results):
+    return sum(STATES[e] * 3 ** i for i, e in enumerate(results))
+
+
+# tile states of a feedback code
+def code_results(code, width=5):
+    names = {v: k for k, v in STATES.items()}
+    return [names[(code // 3 ** i) % 3] for i in range(width)]
+
+
+# (guesses x answers) matrix of feedback codes for two arrays of encoded words (see CandidateIndex.encoded).
+# Computed in blocks of guesses so the boolean intermediates stay small.
+def pattern_matrix(guesses, answers, block=256):
+    width = guesses.shape[1]
+    out = np.empty((len(guesses), len(answers)), dtype=np.uint8)
+    for start in range(0, len(guesses), block):
+        g = guesses[start:start + block]
+        missed = g[:, None, :] != answers[None, :, :]
+        code = np.zeros((len(g), len(answers)), dtype=np.uint8)
+        for i in range(width):
+            letter = g[:, i][:, None]
+            # a letter is yellow while the answer still has unmatched copies of it that earlier yellows haven't used
+            available = np.zeros(code.shape, dtype=np.int8)
+            for j in range(width):
+                available += (answers[None, :, j] == letter) & missed[:, :, j]
+            used = np.zeros(code.shape, dtype=np.int8)
+            for k in range(i):
+                used += (g[:, k] == g[:, i])[:, None] & missed[:, :, k]
+            present = missed[:, :, i] & (available > used)
+            code += ((~missed[:, :, i]) * 2 + present).astype(np.uint8) * 3 ** i
+        out[start:start + block] = code
+    return out
+
+
+# hash of the contents of the dictionary files, in order
+def dictionary_hash(paths, *extra):
+    h = hashlib.sha1()
+    for path in paths:
+        h.update(Path(path).read_bytes())
+        h.update(b"\0")
+    for e in extra:
+        h.update(str(e).encode())
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+# short hash of the contents of numpy arrays, e.g. a store's words or weights
+def array_hash(*arrays):
+    h = hashlib.sha1()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f"{a.dtype.str}{a.shape}".encode())
+        h.update(a.tobytes())
+    return h.hexdigest()[:16]
+
+
+# loads the pattern matrix of the indexed words from cache_dir, computing and saving it first if needed.
+# The matrix is memory mapped, so only the rows that are actually read get paged in.
+def load_pattern_matrix(index, key, cache_dir, print_statements=False):
+    path = Path(cache_dir) / f"patterns_{key}.npy"
+    if path.exists():
+        matrix = np.load(path, mmap_mode="r")
+        if matrix.shape == (index.size, index.size):
+            return matrix
+
+    if print_statements:
+        print(f"Computing {index.size} x {index.size} pattern matrix.")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npy")
+    np.save(tmp, pattern_matrix(index.encoded, index.encoded))
+    tmp.replace(path)
+    return np.load(path, mmap_mode="r")
@@ -0,0 +1,440 @@
+import asyncio
+import json
+import secrets
+import statistics
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from find import WordTrie
+from patterns import ALL_CORRECT, STATES, code_results, pattern
+from simulate import read_answers
+from transposition import TranspositionCache
+from wordle import Wordle, DICTIONARIES
+
+
+# A resident solver: the word store is loaded once and games are played over HTTP/JSON by any number of clients,
+# instead of every suggestion starting a new python process.
+#
+#   POST   /sessions                        {"hard_mode": false}          -> {"session", "guess", "candidates"}
+#   POST   /sessions/<id>/results           {"guess": "tares", "pattern": "bybgb"}  -> {"candidates", "solved"}
+#   GET    /sessions/<id>/suggestion                                      -> {"guess", "candidates"}
+#   GET    /sessions/<id>                                                 -> the session's guesses so far
+#   DELETE /sessions/<id>
+#   GET    /find?pattern=__e__&letters=abdknpo                            -> {"words"}, see find.find_words
+#   GET    /stats
+#
+# A pattern is a feedback code (see patterns.py), a list of tile states ("correct"/"present"/"absent"), a string of
+# g/y/b (green/yellow/black) or of 2/1/0 per letter.
+#
+# Sessions only keep their guesses, feedback codes and remaining word ids (uint16 while the dictionary allows), and
+# expire after ttl seconds without a request. Picking words and purging is done by one shared Wordle, loaded with a
+# session's state for each request, on a single solver thread so the event loop keeps serving while it works.
+#
+#   python server.py 8080 entropy
+#   curl -X POST localhost:8080/sessions
+
+
+class Session:
+    __slots__ = ("id", "candidates", "history", "feedback", "hard_mode", "touched")
+
+    def __init__(self, id, candidates, hard_mode=False):
+        self.id = id
+        self.candidates = candidates
+        self.history = []
+        self.feedback = []
+        self.hard_mode = hard_mode
+        self.touched = time.monotonic()
+
+    def to_json(self, store):
+        return {
+            "session": self.id,
+            "history": self.history,
+            "feedback": self.feedback,
+            "hard_mode": self.hard_mode,
+            "candidates": len(self.candidates),
+            "solved": len(self.feedback) > 0 and self.feedback[-1] == ALL_CORRECT,
+            "words": [store.word(i) for i in self.candidates[:20]],
+        }
+
+
+# an error answered with its HTTP status
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# feedback code of a pattern in any of the forms above
+def parse_pattern(value, width=5):
+    letters = {"g": 2, "y": 1, "b": 0, "2": 2, "1": 1, "0": 0}
+    if isinstance(value, bool):
+        raise HTTPError(400, f"Invalid pattern {value!r}.")
+    if isinstance(value, int):
+        if not 0 <= value < 3 ** width:
+            raise HTTPError(400, f"Pattern {value} is not a feedback code.")
+        return value
+    if isinstance(value, list):
+        if len(value) != width or not all(e in STATES for e in value):
+            raise HTTPError(400, f"Pattern {value!r} is not {width} tile states.")
+        return sum(STATES[e] * 3 ** i for i, e in enumerate(value))
+    if isinstance(value, str):
+        value = value.lower()
+        if len(value) != width or not all(e in letters for e in value):
+            raise HTTPError(400, f"Pattern {value!r} is not {width} of g/y/b or 2/1/0.")
+        return sum(letters[e] * 3 ** i for i, e in enumerate(value))
+    raise HTTPError(400, f"Invalid pattern {value!r}.")
+
+
+# Sessions and the game that plays them. handle() answers a request as (status, JSON-able dict) without any
+# networking, so the service can be used in-process as well.
+#
+# ttl: seconds a session lives without a request
+# max_sessions: the least recently used sessions are dropped past this many
+# game_kwargs: passed to Wordle, e.g. strategy, operation or opening_book. Not reweight: every session is played on the
+#     one game's weights, which reweighting would change for all of them.
+class SolverService:
+    def __init__(self, ttl=None, max_sessions=None, cache=None, **game_kwargs):
+        if ttl is None:
+            ttl = 30 * 60
+        if max_sessions is None:
+            max_sessions = 100000
+        if cache is None:
+            cache = TranspositionCache()
+        if game_kwargs.get("reweight"):
+            raise ValueError("SolverService can't reweight: its sessions share the game's word weights.")
+        game_kwargs.setdefault("dictionary", DICTIONARIES)
+        game_kwargs.setdefault("print_statements", False)
+
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.game = Wordle(browser_game=False, cache=cache, **game_kwargs)
+        self.store = self.game.store
+        self.width = self.store.index.width
+        self.trie = WordTrie(self.store.word(i) for i in self.store.ids)
+        self.id_type = np.uint16 if self.store.size <= np.iinfo(np.uint16).max else np.uint32
+        # least recently used first
+        self.sessions = OrderedDict()
+        self.expired = 0
+        self.requests = 0
+        # the game is only ever touched from this one thread
+        self.solver = ThreadPoolExecutor(max_workers=1)
+
+    def close(self):
+        self.solver.shutdown()
+
+    # drops sessions that have been idle longer than ttl, and the oldest ones past max_sessions
+    def expire(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        while len(self.sessions) > 0:
+            session = next(iter(self.sessions.values()))
+            if now - session.touched <= self.ttl and len(self.sessions) <= self.max_sessions:
+                break
+            self.sessions.popitem(last=False)
+            self.expired += 1
+
+    def session(self, id):
+        session = self.sessions.get(id)
+        if session is None:
+            raise HTTPError(404, f"No session {id}.")
+        session.touched = time.monotonic()
+        self.sessions.move_to_end(id)
+        return session
+
+    # loads a session into the shared game
+    def load(self, session):
+        game = self.game
+        game.candidates = session.candidates if session.candidates is self.store.ids else session.candidates.astype(np.int64)
+        game.guesses = len(session.history)
+        game.history = list(session.history)
+        game.feedback = list(session.feedback)
+        game.hard_mode = session.hard_mode
+        game.rejected = set()
+        game.constraints = type(game.constraints)(self.width)
+        for w, code in zip(session.history, session.feedback):
+            game.constraints.update(w, code)
+        return game
+
+    def start(self, hard_mode=False):
+        self.expire()
+        session = Session(secrets.token_urlsafe(9), self.store.ids, hard_mode=hard_mode)
+        self.sessions[session.id] = session
+        return session
+
+    def suggest(self, session):
+        if len(session.feedback) > 0 and session.feedback[-1] == ALL_CORRECT:
+            return session.history[-1]
+        return self.load(session).select_word()
+
+    def submit(self, session, word, code):
+        game = self.load(session)
+        ids = game.browser_purge(word, code_results(code, self.width))
+        session.candidates = ids if ids is self.store.ids else ids.astype(self.id_type)
+        session.history.append(word)
+        session.feedback.append(code)
+
+    # (status, body) of a request; runs the solver on the solver thread
+    async def handle(self, method, path, query=None, body=None):
+        if query is None:
+            query = {}
+        if body is None:
+            body = {}
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        parts = [e for e in path.split("/") if e != ""]
+
+        if parts == ["sessions"] and method == "POST":
+            hard_mode = body.get("hard_mode", False)
+            # bool("false") would be True
+            if not isinstance(hard_mode, bool):
+                raise HTTPError(400, f"hard_mode should be true or false, not {hard_mode!r}.")
+            session = self.start(hard_mode=hard_mode)
+            guess = await loop.run_in_executor(self.solver, self.suggest, session)
+            return 201, {"session": session.id, "guess": guess, "candidates": len(session.candidates)}
+
+        if len(parts) >= 2 and parts[0] == "sessions":
+            session = self.session(parts[1])
+            if len(parts) == 2 and method == "GET":
+                return 200, session.to_json(self.store)
+            if len(parts) == 2 and method == "DELETE":
+                del self.sessions[session.id]
+                return 200, {"session": session.id}
+            if parts[2:] == ["suggestion"] and method == "GET":
+                guess = await loop.run_in_executor(self.solver, self.suggest, session)
+                return 200, {"guess": guess, "candidates": len(session.candidates)}
+            if parts[2:] == ["results"] and method == "POST":
+                word = str(body.get("guess", "")).lower()
+                if len(word) != self.width or not (word.isalpha() or word in self.store.index.ids_by_word):
+                    raise HTTPError(400, f"Guess {word!r} is not a {self.width} letter word.")
+                code = parse_pattern(body.get("pattern"), self.width)
+                await loop.run_in_executor(self.solver, self.submit, session, word, code)
+                return 200, {"candidates": len(session.candidates), "solved": code == ALL_CORRECT}
+            raise HTTPError(404, f"No route {method} {path}.")
+
+        if parts == ["find"] and method == "GET":
+            p = query.get("pattern", "").lower()
+            letters = query.get("letters", "").lower()
+            if p == "":
+                raise HTTPError(400, "Missing pattern.")
+            limit = int(query.get("limit", 1000))
+            words = []
+            for w in self.trie.query(p, letters):
+                if len(words) >= limit:
+                    break
+                words.append(w)
+            return 200, {"words": words}
+
+        if parts == ["stats"] and method == "GET":
+            self.expire()
+            return 200, {"sessions": len(self.sessions), "expired": self.expired, "requests": self.requests,
+                         "cache": self.game.cache.stats() if self.game.cache is not None else None}
+
+        raise HTTPError(404, f"No route {method} {path}.")
+
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+def response_bytes(status, body, keep_alive=True):
+    content = json.dumps(body, default=int).encode()
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(content)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + content
+
+
+# answers the requests of one connection, kept alive until the client closes it or asks to
+async def serve_connection(service, reader, writer):
+    try:
+        while True:
+            line = await reader.readline()
+            if line == b"":
+                break
+            request = line.decode("latin-1").split()
+            if len(request) != 3:
+                writer.write(response_bytes(400, {"error": "Malformed request line."}, keep_alive=False))
+                break
+            method, target, version = request
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            # without a usable length there's no telling where the body ends, so the connection can't go on either
+            try:
+                length = int(headers.get("content-length", 0))
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                writer.write(response_bytes(400, {"error": "Invalid Content-Length header."}, keep_alive=False))
+                break
+            content = await reader.readexactly(length)
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+            url = urlsplit(target)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                body = json.loads(content) if len(content) > 0 else {}
+                if not isinstance(body, dict):
+                    raise HTTPError(400, "The body should be a JSON object.")
+                status, answer = await service.handle(method, url.path, query, body)
+            except HTTPError as e:
+                status, answer = e.status, {"error": str(e)}
+            except (ValueError, KeyError) as e:
+                status, answer = 400, {"error": str(e)}
+            except Exception as e:
+                status, answer = 500, {"error": f"{type(e).__name__}: {e}"}
+            writer.write(response_bytes(status, answer, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+# expires idle sessions every interval seconds
+async def expire_sessions(service, interval=None):
+    if interval is None:
+        interval = min(60, service.ttl / 4)
+    while True:
+        await asyncio.sleep(interval)
+        service.expire()
+
+
+# starts serving on host:port; returns the asyncio server, with the expiry task running alongside it
+async def start_server(service, host="127.0.0.1", port=8080):
+    server = await asyncio.start_server(lambda r, w: serve_connection(service, r, w), host, port)
+    server.expiry = asyncio.ensure_future(expire_sessions(service))
+    return server
+
+
+async def serve(service, host="127.0.0.1", port=8080):
+    server = await start_server(service, host, port)
+    print(f"Serving on http://{host}:{port} with {len(service.sessions)} sessions.")
+    async with server:
+        await server.serve_forever()
+
+
+# A minimal keep-alive JSON client for the benchmark
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @staticmethod
+    async def connect(host, port):
+        return Client(*await asyncio.open_connection(host, port))
+
+    async def request(self, method, path, body=None):
+        content = b"" if body is None else json.dumps(body).encode()
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(content)}\r\n\r\n".encode() + content)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        answer = json.loads(await self.reader.readexactly(int(headers["content-length"])))
+        if status >= 400:
+            raise HTTPError(status, answer.get("error"))
+        return answer
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+# Plays every answer through the server with concurrency clients at once, one connection each, and returns requests
+# and games per second with request latencies. Starts a server in-process on port unless one is running there
+# (running=True), e.g. started separately with python server.py.
+async def benchmark(answers, concurrency=None, host="127.0.0.1", port=8080, running=False, print_statements=True, **service_kwargs):
+    if concurrency is None:
+        concurrency = 16
+    server = service = None
+    if not running:
+        service = SolverService(**service_kwargs)
+        server = await start_server(service, host, port)
+
+    queue = list(reversed(answers))
+    latencies = []
+    played = []
+
+    async def player():
+        client = await Client.connect(host, port)
+
+        async def timed(method, path, body=None):
+            s = time.perf_counter()
+            answer = await client.request(method, path, body)
+            latencies.append(time.perf_counter() - s)
+            return answer
+
+        try:
+            while len(queue) > 0:
+                answer = queue.pop()
+                session = await timed("POST", "/sessions")
+                guess, guesses = session["guess"], 0
+                while True:
+                    code = pattern(guess, answer)
+                    guesses += 1
+                    await timed("POST", f"/sessions/{session['session']}/results", {"guess": guess, "pattern": code})
+                    if code == ALL_CORRECT or guesses >= 20:
+                        break
+                    guess = (await timed("GET", f"/sessions/{session['session']}/suggestion"))["guess"]
+                await timed("DELETE", f"/sessions/{session['session']}")
+                played.append((answer, guesses, code == ALL_CORRECT))
+        finally:
+            await client.close()
+
+    s = time.perf_counter()
+    try:
+        await asyncio.gather(*[player() for _ in range(concurrency)])
+    finally:
+        if server is not None:
+            server.expiry.cancel()
+            server.close()
+            await server.wait_closed()
+            service.close()
+    seconds = time.perf_counter() - s
+
+    latencies.sort()
+    results = {
+        "games": len(played),
+        "requests": len(latencies),
+        "seconds": seconds,
+        "requests_per_second": len(latencies) / seconds,
+        "games_per_second": len(played) / seconds,
+        "latency_mean": statistics.fmean(latencies),
+        "latency_p50": latencies[len(latencies) // 2],
+        "latency_p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "mean_guesses": statistics.fmean([g for _, g, _ in played]),
+        "failures": len([w for w, g, solved in played if not solved or g > 6]),
+    }
+    if print_statements:
+        print(f"{results['games']} games, {results['requests']} requests in {seconds:.2f}s: "
+              f"{results['requests_per_second']:.0f} requests/s, {results['games_per_second']:.1f} games/s, "
+              f"latency p50 {results['latency_p50'] * 1000:.2f}ms p99 {results['latency_p99'] * 1000:.2f}ms, "
+              f"mean {results['mean_guesses']:.3f} guesses, {results['failures']} failures.")
+    return results
+
+
+if __name__ == "__main__":
+    if len([e for e in sys.argv if "help" in e.lower()]) > 0:
+        print("Usage: python server.py [port] [strategy]")
+        print("       python server.py benchmark [games] [concurrency] [strategy] [answers_file]")
+        print("Example: python server.py 8080 entropy")
+    elif len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        answers = read_answers(sys.argv[5] if len(sys.argv) > 5 else "./dictionaries/five-letter-words_sgb-words.txt")
+        games = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+        asyncio.run(benchmark(answers[:games], concurrency=int(sys.argv[3]) if len(sys.argv) > 3 else None,
+                              port=8765, strategy=sys.argv[4] if len(sys.argv) > 4 else None, seed=0))
+    else:
+        service = SolverService(strategy=sys.argv[2] if len(sys.argv) > 2 else None)
+        try:
+            asyncio.run(serve(service, port=int(sys.argv[1]) if len(sys.argv) > 1 else 8080))
+        finally:
+            service.close()
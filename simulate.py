@@ -0,0 +1,103 @@
+import multiprocessing
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from wordle import Wordle, DICTIONARIES
+
+
+# Solves every word of an answer list without a browser. The dictionary, weights and pattern matrix are loaded once
+# in this process; workers are forked from it so they share that state read-only instead of each loading or
+# unpickling it, and only words and guess counts cross process boundaries.
+
+_game = None
+
+
+# plays one game on the shared game object; returns (word, guesses, solved)
+def solve(word):
+    _game.reset(word)
+    _game.play()
+    return word, _game.guesses, len(_game.history) > 0 and _game.history[-1] == word
+
+
+def _init_worker(game_kwargs):
+    global _game
+    if _game is None:
+        _game = Wordle(**game_kwargs)
+
+
+# words of an answer list file, one per line
+def read_answers(filename):
+    with open(filename) as f:
+        return [e.strip().lower() for e in f if len(e.strip()) > 0]
+
+
+# solves every answer, workers defaults to the number of cores. game_kwargs are passed to Wordle; browser_game and
+# print_statements are always turned off.
+def simulate(answers, workers=None, chunksize=None, print_statements=True, **game_kwargs):
+    global _game
+    game_kwargs = {"dictionary": DICTIONARIES, **game_kwargs, "browser_game": False, "print_statements": False}
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    s = time.time()
+    _game = Wordle(**game_kwargs)
+    if getattr(_game.strategy, "uses_patterns", False):
+        _game.patterns
+    if print_statements:
+        print(f"Loaded {_game.dictionary_length} words in {time.time() - s:.1f}s; solving {len(answers)} answers with {workers} workers.")
+
+    s = time.time()
+    if workers <= 1:
+        results = [solve(e) for e in answers]
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(answers) // (workers * 16))
+        if "fork" in multiprocessing.get_all_start_methods():
+            context, initargs = multiprocessing.get_context("fork"), ({},)
+        else:
+            context, initargs = multiprocessing.get_context(), (game_kwargs,)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=initargs) as pool:
+            results = list(pool.map(solve, answers, chunksize=chunksize))
+
+    report = summarize(results)
+    report["seconds"] = round(time.time() - s, 3)
+    if print_statements:
+        print_report(report)
+    return report
+
+
+# per word guess counts, win rate (solved in 6 or fewer) and the guess count distribution
+def summarize(results):
+    guesses = {w: g for w, g, solved in results}
+    wins = [w for w, g, solved in results if solved and g <= 6]
+    distribution = Counter(g if solved else "unsolved" for w, g, solved in results)
+    solved = [g for w, g, s in results if s]
+    return {
+        "games": len(results),
+        "win_rate": len(wins) / len(results) if len(results) > 0 else 0,
+        "mean_guesses": sum(solved) / len(solved) if len(solved) > 0 else 0,
+        "distribution": {str(k): distribution[k] for k in sorted(distribution, key=lambda k: (k == "unsolved", 0 if k == "unsolved" else k))},
+        "unsolved": [w for w, g, s in results if not s],
+        "guesses": guesses,
+    }
+
+
+def print_report(report):
+    print(f"Solved {report['games']} games in {report['seconds']}s - win rate {report['win_rate'] * 100:.2f}%, mean {report['mean_guesses']:.3f} guesses.")
+    for k, v in report["distribution"].items():
+        print(f"  {k}: {v}")
+    if len(report["unsolved"]) > 0:
+        print(f"Unsolved: {', '.join(report['unsolved'][:20])}{' ...' if len(report['unsolved']) > 20 else ''}")
+
+
+if __name__ == "__main__":
+    if len([e for e in sys.argv if "help" in e.lower()]) > 0:
+        print("Usage: python simulate.py [answers_file] [strategy] [workers]")
+        print("Example: python simulate.py ./dictionaries/five-letter-words_sgb-words.txt entropy 8")
+    else:
+        answers = read_answers(sys.argv[1] if len(sys.argv) > 1 else "./dictionaries/five-letter-words_sgb-words.txt")
+        simulate(answers,
+                 strategy=sys.argv[2] if len(sys.argv) > 2 else None,
+                 workers=int(sys.argv[3]) if len(sys.argv) > 3 else None)
@@ -0,0 +1,390 @@
+import json
+import queue
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from simulate import read_answers
+
+
+# A local stand-in for the NYT page to test browser games against without the network: the same class names, row
+# labels, data-state tiles, "Not in word list" toast and game over modal that browser.py and Wordle look for, with the
+# tile flip delayed like the real animation. Every load of the page starts a new game on the next answer.
+#
+#
+# The same for find.WordValidator: a stub online dictionary that can be told to answer a word with errors first.
+#
+#   python standin.py check              # DriverPool bookkeeping on fake drivers and WordValidator against the stub
+#                                        # dictionary, no chrome or network needed
+#   python standin.py play 20 2          # 20 pooled games in 2 headless chromes against the stand-in page
+#   python standin.py serve 8000         # just serve the page, e.g. to open it in a browser
+
+
+STAND_IN_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Wordle stand-in</title>
+<style>
+    .Board-module_board { display: grid; gap: 4px; width: 260px; }
+    .Row-module_row { display: grid; grid-template-columns: repeat(5, 1fr); gap: 4px; }
+    .Tile-module_tile { height: 48px; border: 2px solid #ccc; font: bold 28px sans-serif; text-align: center; text-transform: uppercase; }
+    .Tile-module_tile[data-state=correct] { background: #6aaa64; }
+    .Tile-module_tile[data-state=present] { background: #c9b458; }
+    .Tile-module_tile[data-state=absent] { background: #787c7e; }
+</style>
+</head>
+<body>
+<div class="App-module_gameContainer__stand">
+    <div class="Welcome-module_welcome" id="welcome"><button class="Welcome-module_button__play">Play</button></div>
+    <div class="Modal-module_help" id="help" hidden><button class="Modal-module_closeIcon__help">X</button></div>
+    <div id="ToastContainer-module_gameToaster__stand"></div>
+    <div><div id="game" hidden><div class="Board-module_board" id="board"></div></div></div>
+    <div class="Modal-module_over" id="over" hidden><button class="Modal-module_close__over">Close</button></div>
+</div>
+<script>
+    const ANSWER = __ANSWER__;
+    const VALID = new Set(__VALID__);
+    const FLIP_MS = __FLIP_MS__;
+    const board = document.getElementById('board');
+    const rows = [];
+    for (let r = 1; r <= 6; r++) {
+        const row = document.createElement('div');
+        row.className = 'Row-module_row';
+        row.setAttribute('aria-label', 'Row ' + r);
+        for (let i = 0; i < 5; i++) {
+            const tile = document.createElement('div');
+            tile.className = 'Tile-module_tile';
+            tile.setAttribute('data-state', 'empty');
+            row.appendChild(tile);
+        }
+        board.appendChild(row);
+        rows.push(row);
+    }
+    let row = 0, typed = '', over = false, busy = false;
+
+    document.querySelector('#welcome button').addEventListener('click', () => {
+        document.getElementById('welcome').remove();
+        document.getElementById('help').hidden = false;
+        document.getElementById('game').hidden = false;
+    });
+    document.querySelector('#help button').addEventListener('click', () => document.getElementById('help').remove());
+    document.querySelector('#over button').addEventListener('click', () => document.getElementById('over').hidden = true);
+
+    const tiles = () => Array.from(rows[row].children);
+    const toast = (text) => {
+        const e = document.createElement('div');
+        e.className = 'Toast-module_toast';
+        e.textContent = text;
+        document.getElementById('ToastContainer-module_gameToaster__stand').appendChild(e);
+        setTimeout(() => e.remove(), 1000);
+    };
+    // wordle's rules for repeated letters
+    const score = (guess) => {
+        const states = Array(5).fill('absent');
+        const left = {};
+        for (let i = 0; i < 5; i++) {
+            if (guess[i] === ANSWER[i]) states[i] = 'correct';
+            else left[ANSWER[i]] = (left[ANSWER[i]] || 0) + 1;
+        }
+        for (let i = 0; i < 5; i++) {
+            if (states[i] !== 'correct' && left[guess[i]] > 0) {
+                states[i] = 'present';
+                left[guess[i]]--;
+            }
+        }
+        return states;
+    };
+    const enter = () => {
+        if (typed.length < 5) return;
+        if (VALID.size > 0 && !VALID.has(typed)) return toast('Not in word list');
+        const states = score(typed);
+        const current = tiles();
+        busy = true;
+        states.forEach((state, i) => setTimeout(() => {
+            current[i].setAttribute('data-state', state);
+            if (i < 4) return;
+            busy = false;
+            const won = states.every(e => e === 'correct');
+            row += 1;
+            typed = '';
+            if (won || row === 6) {
+                over = true;
+                setTimeout(() => document.getElementById('over').hidden = false, FLIP_MS);
+            }
+        }, FLIP_MS * (i + 1)));
+    };
+    document.addEventListener('keydown', (event) => {
+        if (over || busy || document.getElementById('game').hidden) return;
+        if (event.key === 'Enter') return enter();
+        if (event.key === 'Backspace') {
+            if (typed.length === 0) return;
+            typed = typed.slice(0, -1);
+            const tile = tiles()[typed.length];
+            tile.textContent = '';
+            tile.setAttribute('data-state', 'empty');
+            return;
+        }
+        if (/^[a-z]$/i.test(event.key) && typed.length < 5) {
+            const tile = tiles()[typed.length];
+            typed += event.key.toLowerCase();
+            tile.textContent = event.key;
+            tile.setAttribute('data-state', 'tbd');
+        }
+    });
+</script>
+</body>
+</html>
+"""
+
+
+# the page for one game on answer; valid is the word list it accepts (every word if empty)
+def stand_in_page(answer, valid=(), flip_ms=50):
+    return (STAND_IN_PAGE.replace("__ANSWER__", json.dumps(answer)).replace("__VALID__", json.dumps(sorted(valid)))
+            .replace("__FLIP_MS__", str(int(flip_ms))))
+
+
+# Serves the stand-in page on localhost from a background thread, every load playing the next of answers; returns
+# (server, url). port 0 picks a free port. Stop it with server.shutdown().
+def serve(answers, valid=(), port=0, flip_ms=50):
+    answers = list(answers)
+    lock = threading.Lock()
+    state = {"next": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                answer = answers[state["next"] % len(answers)]
+                state["next"] += 1
+            content = stand_in_page(answer, valid, flip_ms).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+# Stands in for a webdriver where only the pool's bookkeeping matters: it records what was done to it and can be
+# made to fail its reset like a crashed browser would.
+class FakeDriver:
+    started = 0
+
+    def __init__(self, broken=False):
+        FakeDriver.started += 1
+        self.broken = broken
+        self.calls = []
+        self.quit_called = False
+
+    def delete_all_cookies(self):
+        if self.broken:
+            raise RuntimeError("browser crashed")
+        self.calls.append("delete_all_cookies")
+
+    def execute_script(self, script, *args):
+        self.calls.append("execute_script")
+
+    def quit(self):
+        self.quit_called = True
+
+
+# checks DriverPool on fake drivers: lazy starts up to size, reuse of released drivers after their board is reset,
+# dropping drivers that can't be reset, blocking when every driver is out (and waking up when one is dropped), and
+# quitting them all on close
+def check_pool():
+    from browser import DriverPool
+
+    FakeDriver.started = 0
+    pool = DriverPool(size=2, factory=FakeDriver)
+    a = pool.acquire()
+    b = pool.acquire()
+    assert FakeDriver.started == 2, "drivers are started lazily, one per acquire up to size"
+    try:
+        pool.acquire(timeout=0.1)
+        raise AssertionError("acquire should block while every driver is out")
+    except queue.Empty:
+        pass
+
+    pool.release(a)
+    assert a.calls[:2] == ["delete_all_cookies", "execute_script"], "released drivers have their board reset"
+    assert pool.acquire() is a and FakeDriver.started == 2, "a released driver is handed out again"
+
+    b.broken = True
+    pool.release(b)
+    assert b.quit_called and len(pool._drivers) == 1, "a driver that can't be reset is dropped"
+    c = pool.acquire()
+    assert c is not b and FakeDriver.started == 3, "a dropped driver is replaced by a new one"
+
+    pool.release(c)
+    with pool.session() as d:
+        assert d is c, "the last driver given back is the first handed out again"
+    assert len(pool._idle) == 1, "a session gives its driver back"
+    pool.close()
+    assert a.quit_called, "close quits every driver"
+    try:
+        pool.acquire()
+        raise AssertionError("a closed pool hands out no drivers")
+    except RuntimeError:
+        pass
+
+    # a caller blocked on a full pool gets a new driver when a driver that can't be reset is dropped, and is woken up
+    # by close
+    pool = DriverPool(size=1, factory=FakeDriver)
+    e = pool.acquire()
+    got = []
+
+    def wait_for_driver():
+        try:
+            got.append(pool.acquire(timeout=5))
+        except RuntimeError:
+            got.append("closed")
+
+    waiter = threading.Thread(target=wait_for_driver)
+    waiter.start()
+    time.sleep(0.1)
+    e.broken = True
+    pool.release(e)
+    waiter.join(5)
+    assert len(got) == 1 and got[0] is not e, "a dropped driver lets a blocked acquire start a new one"
+
+    waiter = threading.Thread(target=wait_for_driver)
+    waiter.start()
+    time.sleep(0.1)
+    pool.close()
+    waiter.join(5)
+    assert got[-1] == "closed", "close wakes blocked acquires with an error"
+    print("DriverPool checks passed.")
+
+
+# Serves a stub online dictionary on localhost from a background thread: GET /<word> is a page with the word's heading
+# like merriam-webster's for the words given, and a 404 for any other. errors maps a word to the statuses to answer it
+# with first, e.g. {"slate": [503]}; every status but 200 and 404 comes with a Retry-After of server.retry_after
+# seconds. Returns (server, url template for WordValidator); server.requests counts the requests for every word.
+def serve_words(words, errors=None, retry_after=0, port=0):
+    if errors is None:
+        errors = {}
+    words = set(words)
+    errors = {w: list(e) for w, e in errors.items()}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            word = self.path.strip("/")
+            with lock:
+                server.requests[word] += 1
+                queued = errors.get(word, [])
+                status = queued.pop(0) if len(queued) > 0 else (200 if word in words else 404)
+            content = f'<html><body><h1 class="hword">{word}</h1></body></html>'.encode() if status == 200 else b""
+            self.send_response(status)
+            if status not in (200, 404):
+                self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.requests = Counter()
+    server.retry_after = retry_after
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/{{}}"
+
+
+# checks WordValidator against the stub dictionary: 200 and 404 verdicts, a 503 retried into a verdict, a 403 that is
+# given up on and never cached, a word repeated while its lookup is in flight being requested once, no wait after the
+# last attempt, and verdicts coming back from the cache file
+def check_validator():
+    from find import WordValidator
+
+    errors = {"slate": [503], "mound": [403] * 10, "pique": [503] * 10}
+    server, url = serve_words(["crane", "slate", "mound"], errors=errors)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_file = Path(tmp) / "verdicts.json"
+            with WordValidator(url=url, rate=0, retries=2, backoff=0.01, cache_file=cache_file) as validator:
+                words = ["crane", "crane", "xxxxx", "slate", "mound", "crane"]
+                verdicts = validator.valid_words(words)
+                assert sorted(verdicts) == ["crane", "slate"], f"valid words {verdicts}"
+                assert server.requests["crane"] == 1, "a word repeated while in flight is requested once"
+                assert server.requests["xxxxx"] == 1 and validator.cache["xxxxx"] is False, "a 404 is a verdict"
+                assert server.requests["slate"] == 2 and validator.cache["slate"] is True, "a 503 is retried"
+                assert server.requests["mound"] == 3 and "mound" not in validator.cache, "a 403 is never cached"
+
+            # the server asks for a minute's wait, which must not be spent once there are no attempts left
+            server.retry_after = 60
+            with WordValidator(url=url, rate=0, retries=0, cache_file=cache_file) as validator:
+                s = time.perf_counter()
+                assert validator.valid_words(["pique"]) == [] and "pique" not in validator.cache
+                assert time.perf_counter() - s < 5, "no wait after the last attempt"
+
+            requests = sum(server.requests.values())
+            with WordValidator(url=url, rate=0, cache_file=cache_file) as validator:
+                assert validator.cache == {"crane": True, "xxxxx": False, "slate": True}, "verdicts are saved"
+                assert sorted(validator.valid_words(["crane", "slate", "xxxxx"])) == ["crane", "slate"]
+                assert sum(server.requests.values()) == requests, "saved verdicts aren't looked up again"
+    finally:
+        server.shutdown()
+    print("WordValidator checks passed.")
+
+
+# plays games in drivers headless chromes against the stand-in page, every game reusing its Wordle
+# and pooled driver through reset(); returns the seconds each game took
+def play_games(answers, games=10, drivers=1, flip_ms=50, dictionary=None):
+    from browser import DriverPool
+    from wordle import Wordle, DICTIONARIES
+
+    if dictionary is None:
+        dictionary = DICTIONARIES
+    answers = answers[:games]
+    server, url = serve(answers, flip_ms=flip_ms)
+    times = []
+    try:
+        with DriverPool(size=drivers, url=url) as pool:
+            game = Wordle(dictionary=dictionary, browser_game=True, pool=pool, save_picture=False, print_statements=False)
+            for i, w in enumerate(answers):
+                s = time.perf_counter()
+                if i > 0:
+                    game.reset()
+                game.play()
+                times.append(time.perf_counter() - s)
+                print(f"{w}: {game.history} in {times[-1]:.2f}s.")
+            game.close()
+    finally:
+        server.shutdown()
+    print(f"Played {len(times)} games, {sum(times) / max(len(times), 1):.2f}s a game.")
+    return times
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or len([e for e in sys.argv if "help" in e.lower()]) > 0:
+        print("Usage: python standin.py check | play [games] [drivers] [answers_file] | serve [port]")
+        print("Example: python standin.py play 20 2")
+    elif sys.argv[1] == "check":
+        check_pool()
+        check_validator()
+    elif sys.argv[1] == "play":
+        play_games(read_answers(sys.argv[4] if len(sys.argv) > 4 else "./dictionaries/five-letter-words_sgb-words.txt"),
+                   games=int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+                   drivers=int(sys.argv[3]) if len(sys.argv) > 3 else 1)
+    elif sys.argv[1] == "serve":
+        server, url = serve(read_answers("./dictionaries/five-letter-words_sgb-words.txt"),
+                            port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
+        print(f"Serving the stand-in page on {url}.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.shutdown()
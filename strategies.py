@@ -0,0 +1,112 @@
+import numpy as np
+
+from patterns import ALL_CORRECT
+
+
+# A strategy is any function that takes a Wordle game and returns the next word to guess from what is left in
+# game.candidates. Wordle(strategy=...) takes one of the names in STRATEGIES or a function.
+
+
+# the word whose weight is closest to the mean weight (the original selector)
+def avg_weighted(game):
+    return game.avg_weighted_word()
+
+
+# the word with the highest weight
+def weighted(game):
+    return game.weighted_word()
+
+
+# any word that is left
+def random_word(game):
+    return game.random_word()
+
+
+# a random pick must not be remembered for the candidate set, see Wordle.caches_picks. avg_weighted and weighted draw
+# at random between words of the same weight, so caching them would fix the first draw for every later game.
+random_word.cacheable = False
+avg_weighted.cacheable = False
+weighted.cacheable = False
+
+
+# Scores every dictionary word by how it would split the remaining candidates into feedback patterns, using the
+# pattern matrix, and picks the best one:
+#   "entropy": highest expected information gain in bits
+#   "expected_remaining": lowest expected number of candidates left after the guess
+# Ties go to words that could still be the answer. When more than sample_size candidates are left the partitions
+# are estimated from a fixed random sample of them, which keeps the pick deterministic for a given seed.
+class InformationStrategy:
+    # tells batch runners to load game.patterns before starting workers
+    uses_patterns = True
+
+    def __init__(self, criterion="entropy", sample_size=2000, block=2048, seed=0):
+        if criterion not in ("entropy", "expected_remaining"):
+            raise ValueError(f"Unknown criterion {criterion}.")
+        self.criterion = criterion
+        self.sample_size = sample_size
+        self.block = block
+        self.seed = seed
+
+    def __call__(self, game):
+        candidates = game.candidates
+        if len(candidates) == 0:
+            return ""
+        if len(candidates) <= 2:
+            return game.index.words[candidates[0]]
+
+        guesses = np.arange(game.index.size)
+        if getattr(game, "hard_mode", False):
+            guesses = game.index.ids(game.allowed_guesses())
+        if len(game.rejected) > 0:
+            rejected = [game.index.ids_by_word[w] for w in game.rejected if w in game.index.ids_by_word]
+            guesses = np.setdiff1d(guesses, rejected)
+        guesses, scores = self.scores(game.patterns, candidates, guesses)
+        is_candidate = np.zeros(game.index.size, dtype=bool)
+        is_candidate[candidates] = True
+        # lexsort sorts by the last key first
+        best = np.lexsort((is_candidate[guesses], scores))[-1]
+        return game.index.words[guesses[best]]
+
+    # (guess ids, scores) with higher scores being better
+    def scores(self, patterns, candidates, guesses=None):
+        if guesses is None:
+            guesses = np.arange(patterns.shape[0])
+        answers = candidates
+        if len(answers) > self.sample_size:
+            answers = np.sort(np.random.default_rng(self.seed).choice(answers, self.sample_size, replace=False))
+
+        scores = np.empty(len(guesses))
+        offsets = None
+        for start in range(0, len(guesses), self.block):
+            rows = np.asarray(patterns[guesses[start:start + self.block]][:, answers], dtype=np.int64)
+            if offsets is None or len(offsets) != len(rows):
+                offsets = np.arange(len(rows))[:, None] * (ALL_CORRECT + 1)
+            counts = np.bincount((rows + offsets).ravel(), minlength=len(rows) * (ALL_CORRECT + 1))
+            counts = counts.reshape(len(rows), ALL_CORRECT + 1)
+            scores[start:start + len(rows)] = self.score(counts, len(answers))
+        return guesses, scores
+
+    def score(self, counts, total):
+        if self.criterion == "entropy":
+            p = counts / total
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return -np.where(p > 0, p * np.log2(p), 0).sum(axis=1)
+        return -(counts.astype(np.float64) ** 2).sum(axis=1) / total
+
+
+STRATEGIES = {
+    "avg_weighted": avg_weighted,
+    "weighted": weighted,
+    "random": random_word,
+    "entropy": InformationStrategy("entropy"),
+    "expected_remaining": InformationStrategy("expected_remaining"),
+}
+
+
+# looks up a strategy by name, functions are passed through
+def get_strategy(strategy):
+    if callable(strategy):
+        return strategy
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy}, expected one of {', '.join(STRATEGIES)} or a function.")
+    return STRATEGIES[strategy]
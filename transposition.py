@@ -0,0 +1,99 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Games keep reaching the same sets of candidates by different paths, across turns and across games, so a
+# Wordle(cache=TranspositionCache()) remembers for every candidate set it has seen:
+#   - the word each strategy picked for it, for strategies whose pick is decided by the candidates (see Wordle.caches_picks)
+#   - the children it was narrowed down to, by (kind of purge, guess, feedback code)
+# Sets are keyed by a 16 byte fingerprint of their word ids. The least recently used sets are evicted once the
+# children held take more than max_bytes. A cache only makes sense for games on one store; share it between them.
+#
+#   cache = TranspositionCache()
+#   for w in answers:
+#       game.reset(w)
+#       game.play()
+#   print(cache.stats())
+
+
+# compact key of a set of word ids
+def fingerprint(ids):
+    return hashlib.blake2b(np.asarray(ids, dtype=np.int64).tobytes(), digest_size=16).digest()
+
+
+class TranspositionCache:
+    # rough size of an entry without its children: the key, dicts and bookkeeping
+    ENTRY_BYTES = 400
+    CHILD_BYTES = 200
+
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        # fingerprint -> (guesses {context: word}, children {(kind, word, code): ids})
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry(self, key, create=False):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        elif create:
+            entry = self.entries[key] = ({}, {})
+            self.bytes += self.ENTRY_BYTES
+        return entry
+
+    def _lookup(self, key, part, name):
+        entry = self._entry(key)
+        value = None if entry is None else entry[part].get(name)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    # the word picked for the set with the given context (e.g. the strategy's name), or None
+    def guess(self, key, context):
+        return self._lookup(key, 0, context)
+
+    def store_guess(self, key, context, word):
+        self._entry(key, create=True)[0][context] = word
+        self._evict()
+
+    # the ids the set was narrowed down to by a purge of kind with word and code, or None
+    def child(self, key, kind, word, code):
+        return self._lookup(key, 1, (kind, word, code))
+
+    def store_child(self, key, kind, word, code, ids):
+        ids = np.array(ids, dtype=np.int64)
+        ids.setflags(write=False)
+        children = self._entry(key, create=True)[1]
+        if (kind, word, code) not in children:
+            self.bytes += ids.nbytes + self.CHILD_BYTES
+        children[(kind, word, code)] = ids
+        self._evict()
+        return ids
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            key, (guesses, children) = self.entries.popitem(last=False)
+            self.bytes -= self.ENTRY_BYTES + sum(e.nbytes + self.CHILD_BYTES for e in children.values())
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0,
+            "evictions": self.evictions,
+        }
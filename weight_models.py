@@ -0,0 +1,98 @@
+import string
+from pathlib import Path
+
+import numpy as np
+
+
+# A weight model scores words from the dictionary as a whole instead of from their letters one at a time. It is
+# passed as Wordle(operation=...) and fills the same weights the letter operations do, so every selector works with
+# it unchanged: word_store.compute_weights calls model.weigh(index, dist, ids) instead of reducing letter terms.
+
+
+ALPHABET = string.ascii_lowercase
+# table slot of anything that isn't a lowercase letter (e.g. "'"), which never scores
+OTHER = len(ALPHABET)
+
+
+# the lines of an endings file, lowercased
+def read_endings(filename):
+    if filename is None or not Path(filename).exists():
+        return ()
+    with open(filename) as f:
+        return tuple(e.strip().lower() for e in f if len(e.strip()) > 0)
+
+
+# Weights words by how typical their letters are where they stand:
+#   positional[p, c]: percent of words with letter c at position p (5 x 26)
+#   bigram[a, b]: percent of the adjacent letter pairs of the words that are a followed by b (26 x 26)
+#   suffix: a bonus of suffix points per letter of the longest ending from endings_file that the word ends with
+# All three tables come from the words being weighed - the whole dictionary, or the remaining candidates when the game
+# reweights - and every word is scored at once with table lookups over its (n x 5) array of letter codes:
+#   weight = positional * sum of positional[p, word[p]] / repeats[p] ** 2
+#            + bigram * sum of bigram[word[p], word[p + 1]] + suffix bonus
+# where repeats[p] is how many times the letter at p occurs in the word.
+# The dist file is not used.
+class PositionalModel:
+    def __init__(self, endings_file="./common_endings.txt", positional=1.0, bigram=1.0, suffix=5.0):
+        self.endings = read_endings(endings_file)
+        self.positional = positional
+        self.bigram = bigram
+        self.suffix = suffix
+
+    # part of the compiled store key, see word_store.store_key
+    def __repr__(self):
+        return f"PositionalModel(endings={self.endings!r}, positional={self.positional}, bigram={self.bigram}, suffix={self.suffix})"
+
+    # the words of the index (or the given ids) as an (n x width) array of table slots
+    @staticmethod
+    def codes(index, ids=None):
+        slots = np.full(len(index.letters) + 1, OTHER, dtype=np.intp)
+        for l, i in index.letters.items():
+            if l in ALPHABET:
+                slots[i] = ALPHABET.index(l)
+        encoded = index.encoded if ids is None else index.encoded[ids]
+        # -1 (past the end of a shorter word) lands on the extra last slot
+        return slots[encoded]
+
+    # (positional, bigram) tables of the codes; the OTHER row and column stay 0
+    @staticmethod
+    def tables(codes):
+        n, width = codes.shape
+        positional = np.zeros((width, OTHER + 1))
+        bigram = np.zeros((OTHER + 1, OTHER + 1))
+        if n == 0:
+            return positional, bigram
+        for p in range(width):
+            positional[p] = np.bincount(codes[:, p], minlength=OTHER + 1) / n * 100
+        if width > 1:
+            pairs = np.bincount((codes[:, :-1] * (OTHER + 1) + codes[:, 1:]).ravel(), minlength=(OTHER + 1) ** 2)
+            bigram = pairs.reshape(OTHER + 1, OTHER + 1) / (n * (width - 1)) * 100
+        positional[:, OTHER] = 0
+        bigram[OTHER, :] = 0
+        bigram[:, OTHER] = 0
+        return positional, bigram
+
+    # bonus of every row of codes for the longest ending it ends with
+    def suffix_bonus(self, codes):
+        bonus = np.zeros(len(codes))
+        width = codes.shape[1]
+        for e in self.endings:
+            if len(e) > width or not all(l in ALPHABET for l in e):
+                continue
+            ending = np.array([ALPHABET.index(l) for l in e])
+            ends = (codes[:, width - len(e):] == ending).all(axis=1)
+            bonus = np.where(ends, np.maximum(bonus, len(e) * self.suffix), bonus)
+        return bonus
+
+    def scores(self, codes):
+        positional, bigram = self.tables(codes)
+        # like the letter weights, a repeated letter counts 1 / count ** 2 at each of its positions
+        repeats = (codes[:, :, None] == codes[:, None, :]).sum(axis=2)
+        score = self.positional * (positional[np.arange(codes.shape[1]), codes] / repeats ** 2).sum(axis=1)
+        if codes.shape[1] > 1:
+            score += self.bigram * bigram[codes[:, :-1], codes[:, 1:]].sum(axis=1)
+        return score + self.suffix_bonus(codes)
+
+    # rounded weights of every word of the index, or of the word ids given
+    def weigh(self, index, dist=None, ids=None):
+        return np.round(self.scores(self.codes(index, ids))).astype(np.int64)
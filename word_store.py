@@ -0,0 +1,325 @@
+import json
+import string
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from candidate_index import CandidateIndex
+from ingest import INGEST_VERSION, ingest, ingest_file
+from metrics import NULL_METRICS
+from patterns import array_hash, dictionary_hash, load_pattern_matrix
+
+
+# creates a data frame from a file of words to be used as a "dictionary", see ingest.py
+def create_dictionary(dictionary):
+    import pandas as pd
+
+    return pd.DataFrame({0: pd.Series(ingest_file(dictionary), dtype=object)})
+
+
+# compiled store file: MAGIC, 4 byte little endian header length, JSON header, padding to a multiple of BLOCK_ALIGN,
+# then a fixed width block of (word, weight) records that is memory mapped as a numpy structured array
+MAGIC = b"WORDSTORE1"
+BLOCK_ALIGN = 64
+
+
+# key for everything a compiled store depends on: the dictionary files, how they are read (ingest.py), the weighting
+# operation and the dist file. A weight model is keyed by its repr and the code of its class.
+def store_key(dictionary, operation, dist_file):
+    code = getattr(operation, "__code__", None)
+    extra = [f"ingest{INGEST_VERSION}", getattr(operation, "__module__", ""), getattr(operation, "__qualname__", repr(operation))]
+    if code is not None:
+        extra += [code.co_code.hex(), repr(code.co_consts)]
+    if hasattr(operation, "weigh"):
+        extra.append(type(operation).__qualname__)
+        for cls in type(operation).__mro__:
+            for f in vars(cls).values():
+                f = getattr(f, "__func__", f)
+                if hasattr(f, "__code__"):
+                    extra += [f.__code__.co_code.hex(), repr(f.__code__.co_consts)]
+    if dist_file is not None and Path(dist_file).exists():
+        extra.append(Path(dist_file).read_bytes().hex())
+    return dictionary_hash(dictionary, *extra)
+
+
+# The merged dictionary, loaded once and never changed afterwards: the words as a fixed width byte string array, their
+# weights, the letter distribution and the candidate index. Games only keep an array of word ids into it, so any
+# number of games (and forked worker processes) can share one store.
+class WordStore:
+    def __init__(self, words, weights, dist, dictionary_files=None, cache_dir=None, index=None):
+        if dictionary_files is None:
+            dictionary_files = []
+        if cache_dir is None:
+            cache_dir = "./cache/"
+
+        # words may also be given as a byte string array, e.g. the memory mapped block of a compiled store
+        encoded = None
+        if isinstance(words, np.ndarray) and words.dtype.kind == "S":
+            encoded, words = words, np.char.decode(words).tolist()
+        self.index = CandidateIndex(words) if index is None else index
+        if encoded is None:
+            encoded = np.array([w.encode() for w in self.index.words], dtype=f"S{max(self.index.width, 1)}")
+        self.words = encoded
+        self.weights = np.asarray(weights)
+        # every word id, which is also the candidate set of a new game
+        self.ids = np.arange(self.index.size)
+        for e in (self.words, self.weights, self.ids):
+            e.setflags(write=False)
+
+        # the letter distribution as its {letter: "percent%"} dict, which compiled stores keep; the data frame is only
+        # made on first use so loading a compiled store doesn't import pandas
+        if isinstance(dist, dict):
+            self.percent, self._dist = dist, None
+        else:
+            self.percent, self._dist = dist["percent"].to_dict(), dist
+        self.dictionary_files = list(dictionary_files)
+        self.cache_dir = cache_dir
+        self._patterns = None
+        self._letter_totals = None
+        self._words_hash = None
+
+    @property
+    def size(self):
+        return self.index.size
+
+    def word(self, i):
+        return self.index.words[i]
+
+    # the letter distribution as a data frame with a "percent" column, see letter_distribution
+    @property
+    def dist(self):
+        if self._dist is None:
+            import pandas as pd
+
+            self._dist = pd.DataFrame({"percent": self.percent})
+        return self._dist
+
+    # how many times each letter of the index occurs over all the words
+    @property
+    def letter_totals(self):
+        if self._letter_totals is None:
+            totals = self.index.counts.sum(axis=0, dtype=np.int64)
+            totals.setflags(write=False)
+            self._letter_totals = totals
+        return self._letter_totals
+
+    # hash of the words as ingested, in store order: what the pattern matrix and opening books are keyed by, so they
+    # follow changes to ingest.py as well as to the dictionary files
+    @property
+    def words_hash(self):
+        if self._words_hash is None:
+            self._words_hash = array_hash(self.words)
+        return self._words_hash
+
+    # (guess x answer) uint8 matrix of feedback codes over the store, see patterns.py
+    @property
+    def patterns(self):
+        if self._patterns is None:
+            self._patterns = load_pattern_matrix(self.index, self.words_hash, self.cache_dir)
+        return self._patterns
+
+    # the given word ids as a data frame like the one Wordle used to keep: words in column 0, a "weights" column and
+    # the word ids as row labels. weights defaults to the store's.
+    def frame(self, ids, weights=None):
+        if weights is None:
+            weights = self.weights
+        import pandas as pd
+
+        return pd.DataFrame({0: self.index.words[ids], "weights": weights[ids]}, index=ids)
+
+    # writes the store to a single file that load_compiled memory maps
+    def compile(self, filename, key=""):
+        block = np.empty(self.size, dtype=[("word", self.words.dtype), ("weight", self.weights.dtype.newbyteorder("<"))])
+        block["word"] = self.words
+        block["weight"] = self.weights
+        header = json.dumps({
+            "key": key,
+            "size": self.size,
+            "dtype": block.dtype.descr,
+            "dist": self.percent,
+        }).encode()
+        offset = -(-(len(MAGIC) + 4 + len(header)) // BLOCK_ALIGN) * BLOCK_ALIGN
+
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(filename).with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + len(header).to_bytes(4, "little") + header)
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(block.tobytes())
+        tmp.replace(filename)
+
+    # header of a compiled store and the offset of its block, or None if the file isn't one
+    @staticmethod
+    def read_header(filename):
+        with open(filename, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            length = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(length))
+        return header, -(-(len(MAGIC) + 4 + length) // BLOCK_ALIGN) * BLOCK_ALIGN
+
+    # a store from a compiled file; the words and weights stay memory mapped
+    @staticmethod
+    def load_compiled(filename, dictionary_files=None, cache_dir=None):
+        header, offset = WordStore.read_header(filename)
+        dtype = np.dtype([tuple(e) for e in header["dtype"]])
+        block = np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=(header["size"],))
+        return WordStore(block["word"], block["weight"], header["dist"], dictionary_files=dictionary_files, cache_dir=cache_dir)
+
+    # loads the dictionary files through a compiled store in cache_dir, compiling it first if the files, operation or
+    # dist file changed since the last compile. metrics (see metrics.py) gets the time each step took.
+    @staticmethod
+    def load(dictionary, operation=sum, dist_file=None, print_statements=False, cache_dir=None, compiled=True, metrics=None):
+        if cache_dir is None:
+            cache_dir = "./cache/"
+        if metrics is None:
+            metrics = NULL_METRICS
+        if not compiled or len(dictionary) == 0:
+            return WordStore.build(dictionary, operation=operation, dist_file=dist_file, print_statements=print_statements, cache_dir=cache_dir, metrics=metrics)
+
+        key = store_key(dictionary, operation, dist_file)
+        path = Path(cache_dir) / f"store_{key}.bin"
+        if path.exists():
+            header = WordStore.read_header(path)
+            if header is not None and header[0]["key"] == key:
+                if print_statements:
+                    print(f"Loading compiled dictionaries from {path}.")
+                with metrics.timer("load_compiled"):
+                    return WordStore.load_compiled(path, dictionary_files=dictionary, cache_dir=cache_dir)
+
+        store = WordStore.build(dictionary, operation=operation, dist_file=dist_file, print_statements=print_statements, cache_dir=cache_dir, metrics=metrics)
+        if store is not None:
+            if print_statements:
+                print(f"Compiling dictionaries to {path}.")
+            with metrics.timer("compile"):
+                store.compile(path, key=key)
+        return store
+
+    # loads, merges and weights the dictionary files; None if there are no words
+    @staticmethod
+    def build(dictionary, operation=sum, dist_file=None, print_statements=False, cache_dir=None, metrics=None):
+        if metrics is None:
+            metrics = NULL_METRICS
+        if print_statements:
+            print("Loading dictionaries.")
+
+        with metrics.timer("read_dictionaries"):
+            words = ingest(dictionary)
+
+        if len(words) == 0:
+            if print_statements:
+                print("Dictionary could not be created.")
+            return None
+
+        with metrics.timer("index"):
+            index = CandidateIndex(words)
+
+        if print_statements:
+            print("Loading distributions for dictionaries.")
+
+        with metrics.timer("distribution"):
+            dist = letter_distribution(index, dist_file)
+
+        if print_statements:
+            print("Loaded distributions.")
+
+        with metrics.timer("weights"):
+            weights = compute_weights(index, dist, operation)
+        return WordStore(words, weights, dist, dictionary_files=dictionary, cache_dir=cache_dir, index=index)
+
+
+# The letter distribution of the words: read from dist_file if it exists, otherwise counted from the index - the
+# percent of every letter of all letters, rounded and keyed like the letter_distributions.txt file would be.
+def letter_distribution(index, dist_file=None):
+    if dist_file is not None and Path(dist_file).exists():
+        import pandas as pd
+
+        return pd.read_csv(dist_file, sep="\t", index_col="letter")
+    # letter totals come from the index's letter count matrix instead of a str.count pass per letter
+    return distribution_from_totals(index, index.counts.sum(axis=0, dtype=np.int64), dist_file)
+
+
+# the letter distribution of totals, the number of times each letter of the index occurs in some set of words
+def distribution_from_totals(index, totals, dist_file=None):
+    import pandas as pd
+
+    total = lambda e: int(totals[index.letters[e]]) if e in index.letters else 0
+    if dist_file is not None:
+        dist = {e: total(e) for e in string.ascii_lowercase}
+        dist_sum = sum([e for e in dist.values()])
+        return pd.DataFrame({"percent": {k: f"{round(round(v / dist_sum * 100, 2), 1)}%" for k, v in dist.items()}})
+    dist = {e: total(e.lower()) for e in string.ascii_uppercase}
+    dist_sum = sum([e for e in dist.values()])
+    return pd.DataFrame({"percent": {k: f"{(round(v / dist_sum, 4) * 100) if dist_sum > 0 else 0}%" for k, v in dist.items()}})
+
+
+# marks a function as a batch weight reducer: instead of one word's list of letter terms it gets an (n x letters)
+# numpy masked array of the terms of every word (masked where a word doesn't have the letter) and returns n weights
+def vectorized(reduce):
+    reduce.vectorized = True
+    return reduce
+
+
+# batch forms of scalar operations; a scalar operation can also carry its own as operation.batch
+BATCH_OPERATIONS = {
+    sum: lambda terms: terms.sum(axis=1),
+}
+
+
+# parses the "percent" column of a distribution into one float per letter of the index, in index order. Letters
+# that aren't in the distribution get 1, like they always have.
+def letter_values(index, dist):
+    percent = {k: float(v[:-1]) for k, v in dist["percent"].items()}
+    values = np.ones(len(index.letters))
+    for l, i in index.letters.items():
+        values[i] = percent.get(l.upper(), 1)
+    return values
+
+
+# the letter values of totals the same way letter_values would parse distribution_from_totals(index, totals), without
+# building the data frame in between
+def totals_values(index, totals):
+    letters = {l: i for l, i in index.letters.items() if l in string.ascii_lowercase}
+    total = sum(int(totals[i]) for i in letters.values())
+    values = np.ones(len(index.letters))
+    for l, i in letters.items():
+        values[i] = (round(int(totals[i]) / total, 4) * 100) if total > 0 else 0
+    return values
+
+
+# weight of every word (or of the word ids given): operation over the word's distinct letters of (letter percent /
+# count of the letter ** 2), rounded. Runs as a single pass over the (n x letters) count matrix when the operation
+# has a batch form and falls back to calling the operation word by word otherwise. values are the letter values to
+# use instead of the ones parsed from dist. An operation with a weigh(index, dist, ids) method is a weight model and
+# does all of it itself.
+def compute_weights(index, dist, operation=sum, ids=None, values=None):
+    # weight models (see weight_models.py) weigh the words themselves
+    if hasattr(operation, "weigh"):
+        return operation.weigh(index, dist, ids)
+    if values is None:
+        values = letter_values(index, dist)
+    counts = index.counts if ids is None else index.counts[ids]
+    present = counts > 0
+    terms = values[None, :] / np.where(present, counts, 1).astype(np.float64) ** 2
+
+    batch = getattr(operation, "batch", None) or BATCH_OPERATIONS.get(operation)
+    if batch is None and getattr(operation, "vectorized", False):
+        batch = operation
+    if batch is not None:
+        weights = np.asarray(np.ma.filled(batch(np.ma.masked_array(terms, mask=~present)), np.nan), dtype=np.float64)
+        return np.round(weights).astype(np.int64)
+
+    return np.array([round(operation(terms[i, present[i]].tolist())) for i in range(len(counts))], dtype=np.int64)
+
+if __name__ == "__main__":
+    if len([e for e in sys.argv if "help" in e.lower()]) > 0:
+        print("Usage: python word_store.py [dictionary_file ...]")
+        print("Compiles the dictionaries (the bot's dictionaries by default) into ./cache/ so games start with a single mmap.")
+    else:
+        from wordle import DICTIONARIES
+
+        s = time.time()
+        store = WordStore.load(sys.argv[1:] if len(sys.argv) > 1 else DICTIONARIES, print_statements=True)
+        print(f"Compiled {0 if store is None else store.size} words in {time.time() - s:.1f}s.")
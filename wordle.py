@@ -1,33 +1,39 @@
-import pandas as pd
+import numpy as np
 import random
-import time
-
-from bs4 import BeautifulSoup
-import requests
-
-from itertools import permutations
-from math import perm
-
-# selenium imports
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.common.by import By
+import sys
 
 from datetime import datetime as dt
-import asyncio
 from pathlib import Path
-import string
 
 # "built-in" sum, but for products
 from functools import reduce
 import operator
 
+from patterns import pattern, pattern_matrix, results_code
+from word_store import WordStore, compute_weights, create_dictionary, totals_values
+from strategies import get_strategy
+from opening_book import book_key, load_opening_book, strategy_name
+from metrics import NULL_METRICS
+from constraints import Constraints
+from transposition import fingerprint
+
+# The solver above only needs numpy. Selenium (browser.py), the online validators (find.py) and pandas are imported
+# where they are used, so offline games, simulations and pattern queries start without loading them.
+
+# the dictionaries the bot plays with
+DICTIONARIES = [
+    "./dictionaries/all_words_question_mark.txt",
+    "./dictionaries/five-letter-words_sgb-words.txt",
+    "./dictionaries/english3.txt",
+    "./dictionaries/more_words.txt",
+    #"./dictionaries/Oxford English Dictionary Words.txt",
+    "./dictionaries/usa.txt",
+]
+
 # dictionary: list of strings to files to use as dictionaries
 # print_statements: toggles print statements
 # operation: what function to use to give weights to the words
+#     (or a weight model, e.g. weight_models.PositionalModel() to weigh by letter positions, pairs and endings)
 # browser_game: if the game is meant to be played by selenium
 #     word: the word that is being guessed
 # starting_guess_word: the word that the bot uses first
@@ -35,6 +41,27 @@ import operator
 # debug: turns on debug logging
 # dist_file: the letter distribution weights
 # word_delta: the variance between the max score and the lowest score
+# cache_dir: where precomputed data (e.g. the pattern matrix) is saved between runs
+# strategy: how words are picked; a name from strategies.STRATEGIES ("avg_weighted", "weighted", "random", "entropy",
+#     "expected_remaining") or a function that takes the game and returns a word
+# opening_book: file made by opening_book.py with precomputed guesses for the first turns
+# load_patterns: computes/loads the guess x answer pattern matrix up front instead of on first use
+# check_timeout: default seconds to wait for a row of tiles to flip over in the browser
+# poll_interval: seconds between fallback checks of the tiles while waiting
+# url: the game page, e.g. a local stand-in page for testing
+# driver: a webdriver to play in instead of starting a new one; it is left open when the game is closed
+# pool: a browser.DriverPool to take the webdriver from; it goes back to the pool when the game is closed
+# compile_dictionary: loads the dictionaries through a compiled file in cache_dir, see WordStore.load
+# store: an already loaded WordStore to share with other games; dictionary, operation and dist_file are then ignored
+# seed: seeds the random picks of the game (ties between words, the random strategy) so games can be repeated;
+#     without one the random module is used as before
+# metrics: a metrics.Metrics to record the time spent loading, purging, picking words and waiting on the browser in,
+#     along with candidate counts and retries; nothing is recorded without one
+# reweight: re-derives the letter distribution and the weights from the remaining candidates after every guess instead
+#     of ranking them by the letters of the whole dictionary, see update_weights
+# hard_mode: every guess has to agree with everything the feedback so far revealed (greens, yellows and letter
+#     counts, see constraints.py), which also satisfies the website's hard mode
+# cache: a transposition.TranspositionCache to remember picks and purges by candidate set, across turns and games
 class Wordle:
     def __init__(
         self,
@@ -47,7 +74,23 @@ class Wordle:
         save_picture=None,
         debug=None,
         dist_file=None,
-        word_delta=None
+        word_delta=None,
+        cache_dir=None,
+        load_patterns=None,
+        strategy=None,
+        opening_book=None,
+        store=None,
+        compile_dictionary=None,
+        check_timeout=None,
+        poll_interval=None,
+        url=None,
+        driver=None,
+        pool=None,
+        seed=None,
+        metrics=None,
+        reweight=None,
+        hard_mode=None,
+        cache=None
     ):
     
         if dictionary is None:
@@ -66,32 +109,65 @@ class Wordle:
             debug = False
         if word_delta is None:
             word_delta = 5
+        if cache_dir is None:
+            cache_dir = "./cache/"
+        if load_patterns is None:
+            load_patterns = False
+        if strategy is None:
+            strategy = "avg_weighted"
+        if compile_dictionary is None:
+            compile_dictionary = True
+        if check_timeout is None:
+            check_timeout = 5
+        if poll_interval is None:
+            poll_interval = 0.1
+        if url is None and browser_game:
+            from browser import WORDLE_URL
+            url = pool.url if pool is not None else WORDLE_URL
+        if metrics is None:
+            metrics = NULL_METRICS
+        if reweight is None:
+            reweight = False
+        if hard_mode is None:
+            hard_mode = False
         
         self.print_statements = print_statements
         self.debug = debug
         self.save_picture = save_picture
         self.browser_game = browser_game
         self.starting_guess_word = None
+        self.check_timeout = check_timeout
+        self.poll_interval = poll_interval
+        self.url = url
+        self.pool = pool
+        # only drivers the game started itself are quit when it closes
+        self._owns_driver = browser_game and driver is None and pool is None
+        self.driver = None
+        # the driver's async script timeout as last set, see script_timeout
+        self._script_timeout = None
+        # tile states of rows that have finished flipping, by row number
+        self.row_states = {}
+        self.strategy = get_strategy(strategy)
+        self.random = random if seed is None else random.Random(seed)
+        self.metrics = metrics
+        self.operation = operation
+        self.reweight = reweight
+        self.hard_mode = hard_mode
+        self.cache = cache
+        # (candidates, fingerprint) of the last candidate set fingerprinted
+        self._fingerprint = (None, None)
 
         if self.browser_game:
+            from browser import new_driver, open_game
+
             if self.print_statements:
                 print("Loading webdriver.")
-            options = webdriver.ChromeOptions()
-            options.add_argument('--headless')
-            self.driver = webdriver.Chrome(options=options)
-            self.driver.get("https://www.nytimes.com/games/wordle/index.html")
-            buttons = self.driver.find_elements(By.CSS_SELECTOR, "button[class*=Welcome-module_button__]")
-            for button in buttons:
-                if button.text.strip().lower() == "play":
-                    play_button = button
-                    break
-            play_button.click()
-            time.sleep(1)
-            modal_button = self.driver.find_element(By.CSS_SELECTOR, "button[class*=Modal-module_closeIcon")
-            modal_button.click()
-            self.gameboard = self.driver.find_element(By.CSS_SELECTOR, "div[class*=Board-module_board]")
-            self.body = self.driver.find_element(By.TAG_NAME, "body")
-            self.body.send_keys(Keys.RETURN)
+            with metrics.timer("driver_start"):
+                if driver is None:
+                    driver = pool.acquire() if pool is not None else new_driver()
+                self.driver = driver
+                self.gameboard, self.body = open_game(self.driver, url=url)
+                self.script_timeout(self.check_timeout)
             if self.print_statements:
                 print("Loaded webdriver.")
         else:
@@ -100,249 +176,378 @@ class Wordle:
         self.word_delta = word_delta
         self.guesses = 0
         self.history = []
+        # feedback codes of the guesses in history, see patterns.py
+        self.feedback = []
+        # words the website wouldn't take
+        self.rejected = set()
+        # what the feedback so far says about the word
+        self.constraints = Constraints()
+
+        # the words never change; a game only narrows down which of them are still candidates
+        if store is None:
+            with metrics.timer("dictionary_load"):
+                store = WordStore.load(dictionary, operation=operation, dist_file=dist_file, print_statements=self.print_statements, cache_dir=cache_dir, compiled=compile_dictionary, metrics=metrics)
+        self.store = store
+        self.index = None if store is None else store.index
+        self.dictionary_files = [] if store is None else store.dictionary_files
+        self.dictionary_length = 0 if store is None else store.size
+        self.candidates = None if store is None else store.ids
+        if store is not None:
+            self.constraints = Constraints(store.index.width)
+        # weights of the candidates; the store's until update_weights gives the game its own
+        self.weights = None if store is None else store.weights
+        self._letter_totals = None
+        if store is not None and load_patterns:
+            self.patterns
+
+        self.book = None
+        if opening_book is not None and self.index is not None:
+            self.starting_guess_word = starting_guess_word
+            book = load_opening_book(opening_book, self)
+            if book is not None:
+                self.book = book["book"]
 
         if self.print_statements:
-            print("Loading dictionaries.")
-
-        if len(dictionary) > 0:
-            self.dictionary = pd.concat([Wordle.create_dictionary(e) for e in dictionary]).drop_duplicates().reset_index(drop=True)
-        else:
-            self.dictionary = pd.DataFrame()
-
-        self.dictionary_length = len(self.dictionary)
-
-        if self.print_statements:
-            print("Loading distributions for dictionaries.")
-
-        if dist_file is not None:
-            if Path(dist_file).exists():
-                self._dist = pd.read_csv(dist_file, sep="\t", index_col="letter")
-            else:
-                dist = {e: round(sum(self.dictionary[0].str.count(e)), 4) for e in string.ascii_lowercase}
-                dist_sum = sum([e for e in dist.values()])
-                self._dist = pd.DataFrame({"percent": {k: f"{round(round(v / dist_sum * 100, 2), 1)}%" for k, v in dist.items()}})
-        else:
-            dist = {e: round(sum(self.dictionary[0].str.count(e.lower())), 4) for e in string.ascii_uppercase}
-            dist_sum = sum([e for e in dist.values()])
-            self._dist = pd.DataFrame({"percent": {k: f"{(round(v / dist_sum, 4) * 100)}%" for k, v in dist.items()}})
-
-        if self.print_statements:
-            print("Loaded distributions.")
-
-        if self.dictionary.size == 0:
-            self.dictionary = None
-            if self.print_statements:
-                print("Dictionary could not be created.")
-        else:
-            self.dictionary["weights"] = self.dictionary[0].apply(lambda x: round(operation([float(self._dist.loc[e.upper()]["percent"][:-1]) / (x.count(e) ** 2) if e.upper() in self._dist.index else 1 / (x.count(e) ** 2) for e in set(x)])))
-
-        if self.print_statements:
-            if self.dictionary is not None:
+            if self.store is not None:
                 print("Loaded dictionaries.")
         
         
         if starting_guess_word is None:
-            starting_guess_word = self.avg_weighted_word()
+            starting_guess_word = self.select_word()
         self.starting_guess_word = starting_guess_word
 
+    def __enter__(self):
+        return self
+
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # hands the webdriver back to its pool, or quits it if the game started it. A driver the game was given stays open
+    # and with the game.
+    def close(self):
+        if self.driver is None:
+            return
+        if self.pool is not None:
+            self.pool.release(self.driver)
+        elif self._owns_driver:
+            self.driver.quit()
+        else:
+            return
+        self.driver = None
+        self.gameboard, self.body = None, None
+
+    # starts a new game on the same dictionary; word is the word to guess when not playing in the browser. In the
+    # browser the board is cleared and the page reopened on the same webdriver, or - once play() or close() gave the
+    # driver up - on one taken from the pool again, or a new one if the game started its own.
+    def reset(self, word=None):
+        if word is not None:
+            self.WORD = word
         if self.browser_game:
-            self.driver.close()
+            from browser import new_driver, open_game, reset_board
+
+            with self.metrics.timer("driver_reset"):
+                if self.driver is not None:
+                    reset_board(self.driver)
+                elif self.pool is not None:
+                    self.driver = self.pool.acquire()
+                elif self._owns_driver:
+                    self.driver = new_driver()
+                self.gameboard, self.body = open_game(self.driver, url=self.url)
+                # the driver may have come from the pool with another game's timeout
+                self._script_timeout = None
+                self.script_timeout(self.check_timeout)
+        if self.store is not None:
+            self.candidates = self.store.ids
+            self.weights = self.store.weights
+        self._letter_totals = None
+        self.guesses = 0
+        self.history = []
+        self.feedback = []
+        self.rejected = set()
+        self.constraints = Constraints(self.index.width if self.index is not None else 5)
+        self.row_states = {}
 
     # This is to build a dictionary over time of all the possible words supported in wordle.
-    # Under Dev...
+    # Letter combinations that pass the bigram check of crawl.py against the known dictionaries are typed into the
+    # game by a WordleSiteValidator on drivers browsers; the words it accepts are appended to out_filename. Progress is
+    # checkpointed next to out_filename, so calling it again with the same arguments resumes the crawl.
+    # validator: anything with find.WordValidator's interface to check the words with instead of the website
+    # dictionaries: the files the letter pairs come from, DICTIONARIES by default, or [] to try every combination
     @staticmethod
-    def build_dictionary_from_wordle_website(out_filename, print_statements=True, num_of_letters=5):
+    def build_dictionary_from_wordle_website(out_filename, print_statements=True, num_of_letters=5, validator=None,
+                                             dictionaries=None, drivers=None, checkpoint_file=None, report_every=10):
         if not Path(out_filename).parent.exists():
             print("Parent directory does not exist.")
             return None
+        if dictionaries is None:
+            dictionaries = DICTIONARIES
+        if drivers is None:
+            drivers = 4
+        import pandas as pd
+        from crawl import crawl, known_words, plausible_words
+
+        candidates = plausible_words(known_words(dictionaries, num_of_letters) if len(dictionaries) > 0 else None,
+                                     num_of_letters)
+
+        pool = None
+        if validator is None:
+            from browser import DriverPool, WordleSiteValidator
+
+            pool = DriverPool(size=drivers)
+            validator = WordleSiteValidator(pool, remember=False)
+        try:
+            words = crawl(out_filename, validator, candidates, checkpoint_file=checkpoint_file,
+                          print_statements=print_statements, report_every=report_every)
+        finally:
+            if pool is not None:
+                validator.close()
+                pool.close()
 
-        l = asyncio.new_event_loop()
-        words = pd.DataFrame({"words": []})
-
-        # wordle is currently played with 5 letter words...
-        letter_combos = permutations(string.ascii_lowercase, num_of_letters)
-        pc = perm(len(string.ascii_lowercase), num_of_letters)
-        if print_statements:
-            print(f"Building {pc} permutations...")
-
-        async def check_word(w, d):
-            if isinstance(d, pd.core.frame.DataFrame):
-                if sum([1 for e in results if e == "empty"]) > 0:
-                    # if self.print_statements:
-                    #     # the word could not be long enough, maybe because the animation wasn't done loading for the tiles.
-                    #     # tbd
-                    #     #print("Word not long enough. Returning previously guessed word.")
-                    return self.history[-1]
-
-                while sum([1 for e in results if e == "tbd"]) > 0:
-                    # remove the entry from the dictionary
-                    self.dictionary = self.browser_purge(w, results)
-                    # backspace the characters
-                    d = [self.body.send_keys(Keys.BACKSPACE) for e in results]
-
-                    w = self.avg_weighted_word()
-                    self.body.send_keys(w)
-                    self.body.send_keys(Keys.RETURN)
-
-                    response = self.gameboard.find_element(By.XPATH, f".//div[@aria-label='Row {len(self.history) + 1}']")
-                    results = asyncio.run(self.check(response, max_wait=3))
-
-        async def check_words(loop, combos, d=None, update_percent=8):
-            counter = 0
-            for i, e in enumerate(combos):
-                if i / len(combos) >= counter / update_percent:
-                    counter += 1
-                    print(f"Update: {counter / update_percent * 100}% with {len(d)} words.")
-                loop.create_task(check_word(e, d))
-
-        l.run_until_complete(check_words(l, letter_combos, d=words))
-        l.close()
         if print_statements:
             print("Finished generating dictionary from wordle website.")
-        return words
+        return pd.DataFrame({"words": sorted(words)})
 
     # creates a data frame from a file of words to be used as a "dictionary"
-    @staticmethod
-    def create_dictionary(dictionary):
-        df = pd.read_csv(dictionary, header=None)
-        df = df.loc[df[0].str.len() == 5]
-        df[0] = df[0].str.lower()
-        return df
+    create_dictionary = staticmethod(create_dictionary)
+
+    # the remaining candidates as a data frame: words in column 0, a "weights" column and the word ids as row labels.
+    # Built on demand from the store; games themselves only keep self.candidates.
+    @property
+    def dictionary(self):
+        return None if self.store is None else self.store.frame(self.candidates, self.weights)
+
+    # takes a frame from self.dictionary (or a filtered copy of it) or an array of word ids
+    @dictionary.setter
+    def dictionary(self, value):
+        # without pandas loaded value can't be a frame
+        pd = sys.modules.get("pandas")
+        self.candidates = np.sort(np.asarray(value.index if pd is not None and isinstance(value, pd.DataFrame) else value, dtype=np.int64))
+
+    # picks the next word with the game's strategy
+    def select_word(self):
+        if self.guesses == 0 and self.starting_guess_word is not None:
+            return self.starting_guess_word
+        with self.metrics.timer("select_word"):
+            w = self.book_word()
+            if w is not None:
+                return w
+            if not self.caches_picks():
+                return self.strategy(self)
+            key, context = self.cache_key(), strategy_name(self.strategy)
+            w = self.cache.guess(key, context)
+            if w is None:
+                w = self.strategy(self)
+                self.cache.store_guess(key, context, w)
+            return w
+
+    # whether the strategy's pick only depends on the candidates, so it can be cached: not for strategies that draw at
+    # random (see strategies.py), rejected words, hard mode or reweighting
+    def caches_picks(self):
+        return (self.cache is not None and getattr(self.strategy, "cacheable", True) and len(self.rejected) == 0
+                and not self.hard_mode and not self.reweight)
+
+    # fingerprint of the candidates for self.cache, worked out once per candidate set
+    def cache_key(self):
+        if self._fingerprint[0] is not self.candidates:
+            self._fingerprint = (self.candidates, fingerprint(self.candidates))
+        return self._fingerprint[1]
+
+    # the opening book's next word, if every guess so far followed the book
+    def book_word(self):
+        if self.book is None or len(self.feedback) != len(self.history):
+            return None
+        for i, w in enumerate(self.history):
+            if self.book.get(book_key(self.feedback[:i])) != w:
+                return None
+        w = self.book.get(book_key(self.feedback))
+        if w is None or w in self.rejected or (self.hard_mode and not self.constraints.allows(w)):
+            return None
+        return w
 
     # picks a random word
-    def random_word(self, random=None):
-        if random is None:
-            random = self.starting_guess_word
+    def random_word(self, word=None):
+        if word is None:
+            word = self.starting_guess_word
 
         # I didn't want it picking a really stupid word on the first guess, unless you wanted it too
-        return random if self.guesses == 0 else (self.dictionary[0][random.randint(0, len(self.dictionary) - 1)] if len(self.dictionary) > 0 else "")
+        return word if self.guesses == 0 else (self.store.word(self.candidates[self.random.randint(0, len(self.candidates) - 1)]) if len(self.candidates) > 0 else "")
 
     # picks the weighted average word
     def avg_weighted_word(self):
         if self.guesses == 0 and self.starting_guess_word is not None:
             return self.starting_guess_word
 
-        a = self.dictionary.copy()
-        if len(a) == 0:
+        if len(self.candidates) == 0:
             if self.print_statements:
                 print("self.avg_weighted_word(): Dictionary has a length of 0.")
-                return self.starting_guess_word
-        mean = round(a["weights"].mean())
-        target_weight = (a["weights"] - mean).apply(abs).sort_values().iloc[0]
-        a = a[(a["weights"] - mean).abs() == target_weight]
+            return self.starting_guess_word
+        weights = self.weights[self.candidates]
+        distance = np.abs(weights - round(weights.mean()))
+        a = self.candidates[distance == distance.min()]
 
-        return a[0].iloc[random.randint(0, len(a) - 1)]
+        return self.store.word(a[self.random.randint(0, len(a) - 1)])
 
     # picks a weighted word
     def weighted_word(self):
         if self.guesses == 0 and self.starting_guess_word is not None:
             return self.starting_guess_word
 
-        a = self.dictionary.copy()
-        a = a.sort_values(by=["weights"], ascending=False).reset_index(drop=True)
+        if len(self.candidates) == 0:
+            return ""
+
+        # the same order of ties as the pandas sort_values(ascending=False) this replaced
+        weights = self.weights[self.candidates][::-1]
+        a = self.candidates[::-1][weights.argsort(kind="quicksort")][::-1]
+        weights = self.weights[a]
 
         if self.guesses == 0:
-            max_val = a["weights"].iloc[0]
-            a = a[a["weights"] >= max_val - self.word_delta]
-            return a[0].iloc[random.randint(0, len(a) - 1)]
-
-        if len(a) == 0:
-            return ""
+            a = a[weights >= weights[0] - self.word_delta]
+            return self.store.word(a[self.random.randint(0, len(a) - 1)])
 
-        #a = a[a["weights"] == a["weights"][0]].reset_index(drop=True)
-        a = a[a["weights"] == a["weights"][0]]
+        a = a[weights == weights[0]]
 
         if self.debug:
-            print([(a[0][i], a["weights"][i]) for i in range(len(a[:3]))])
+            print([(self.store.word(e), self.weights[e]) for e in a[:3]])
 
-        return a[0].iloc[random.randint(0, len(a) - 1)]
+        return self.store.word(a[self.random.randint(0, len(a) - 1)])
 
-    # purge the dictionary of words that the true word can't be
+    # purge the dictionary of words that the true word can't be; returns the remaining word ids and the word's weight
     def purge(self, word):
-        a = self.dictionary[self.dictionary[0].str.len() == len(word)]
-        for i in range(len(word)):
-            if word[i] == self.WORD[i]:
-                a = a[a[0].str[i] == word[i]]
-            elif word[i] in self.WORD:
-                a = a[(a[0].str.contains(word[i])) & (a[0].str[i] != word[i])]
+        with self.metrics.timer("purge"):
+            if self.cache is None:
+                return self.keep(self.index.purge_mask(word, self.WORD)), self.weight(word)
+            key, code = self.cache_key(), self.index.purge_code(word, self.WORD)
+            ids = self.cache.child(key, "purge", word, code)
+            if ids is None:
+                ids = self.cache.store_child(key, "purge", word, code, self.keep(self.index.purge_mask(word, self.WORD)))
+            return ids, self.weight(word)
+
+    # the candidates that are also in a bitset from self.index
+    def keep(self, mask):
+        return self.candidates[np.unpackbits(mask, count=self.index.size)[self.candidates].astype(bool)]
+
+    # bitset over the dictionary of the words that may be guessed now: all of them, or in hard mode only the ones that
+    # agree with the feedback so far
+    def allowed_guesses(self):
+        return self.constraints.mask(self.index) if self.hard_mode else self.index.all
+
+    # is the word one of the remaining candidates
+    def is_candidate(self, word):
+        i = self.index.ids_by_word.get(word)
+        if i is None:
+            return False
+        j = np.searchsorted(self.candidates, i)
+        return j < len(self.candidates) and self.candidates[j] == i
+
+    # weight of a word that is still in the dictionary, 0 otherwise
+    def weight(self, word):
+        return self.weights[self.index.ids_by_word[word]] if self.is_candidate(word) else 0
+
+    # With reweight on, re-derives the letter distribution and the weights of the candidates left after
+    # narrowing them down from previous. The letter totals of the candidates are kept from turn to turn and only the
+    # letters of the words removed since previous are subtracted - or the survivors recounted when fewer of them are
+    # left than were removed - so a turn costs the smaller of the two rather than a pass over the dictionary.
+    def update_weights(self, previous):
+        if not self.reweight or self.store is None:
+            return
+        with self.metrics.timer("update_weights"):
+            if self._letter_totals is None:
+                self._letter_totals = self.store.letter_totals.copy() if len(previous) == self.store.size else self.index.counts[previous].sum(axis=0, dtype=np.int64)
+                self.weights = self.store.weights.copy()
+
+            if len(previous) - len(self.candidates) > len(self.candidates):
+                self._letter_totals = self.index.counts[self.candidates].sum(axis=0, dtype=np.int64)
             else:
-                a = a[~a[0].str.contains(word[i])]
-        weight = self.dictionary[self.dictionary[0] == word]["weights"]
-        weight = weight.iloc[0] if len(weight) > 0 else 0
-        return a.reset_index(drop=True), weight
+                removed = np.setdiff1d(previous, self.candidates, assume_unique=True)
+                self._letter_totals -= self.index.counts[removed].sum(axis=0, dtype=np.int64)
+
+            if len(self.candidates) > 0:
+                values = totals_values(self.index, self._letter_totals)
+                self.weights[self.candidates] = compute_weights(self.index, None, self.operation, ids=self.candidates, values=values)
+
+    # (guess x answer) uint8 matrix of feedback codes over the full dictionary, see patterns.py
+    @property
+    def patterns(self):
+        return self.store.patterns
+
+    # feedback codes of word against every word in the full dictionary
+    def pattern_row(self, word):
+        i = self.index.ids_by_word.get(word)
+        if i is not None:
+            return np.asarray(self.patterns[i])
+        return pattern_matrix(self.index.encode(word)[None, :], self.index.encoded)[0]
+
+    # purge the dictionary down to the words that would give the feedback code (or browser tile states) for word.
+    # Unlike purge/browser_purge this follows wordle's rules for repeated letters, and it is a single row lookup (a
+    # word outside the dictionary has its row worked out, see pattern_row).
+    def pattern_purge(self, word, code):
+        if not isinstance(code, (int, np.integer)):
+            code = results_code(code)
+        return self.candidates[self.pattern_row(word)[self.candidates] == code]
 
     # make a guess
     def guess(self):
-        self.dictionary, weight = self.purge((w := self.avg_weighted_word()))
+        self.metrics.set_guess(self.guesses + 1)
+        self.metrics.record("candidates_before", len(self.candidates))
+        previous = self.candidates
+        self.candidates, weight = self.purge((w := self.select_word()))
+        self.constraints.update(w, pattern(w, self.WORD))
+        if self.hard_mode:
+            self.candidates = self.keep(self.constraints.mask(self.index))
+        self.update_weights(previous)
+        self.metrics.record("candidates_after", len(self.candidates))
         self.guesses += 1
         self.history.append(w)
+        self.feedback.append(pattern(w, self.WORD))
         if self.print_statements:
-            print(f"Guess {self.guesses} is {w} ({weight}) with {len(self.dictionary)} options remaining out of {self.dictionary_length}.")
+            print(f"Guess {self.guesses} is {w} ({weight}) with {len(self.candidates)} options remaining out of {self.dictionary_length}.")
         return w
 
     # selenium's way of purgin a word - "purge" should probably be used here for DRY 
     def browser_purge(self, word, results):
-        a = self.dictionary[self.dictionary[0].str.len() == len(word)]
-        absent_locations = set()
-        absent_letters = set()
-        present_letters = set()
-
         if sum([1 for e in results if e == "empty"]) > 0:
             if self.debug:
                 print(f"Empty on {word}")
-            return a
+            return self.candidates
 
         if sum([1 for e in results if e == "tbd"]) > 0:
             if self.debug:
                 print(f"TBD on {word}")
-            return a[a[0] != word].reset_index(drop=True)
-
-        for i in range(len(word)):
-            if results[i] == "correct":
-                a = a[a[0].str[i] == word[i]]
-            elif results[i] == "present":
-                # wrong location; the location should also be appended to absent_locations set for clean up
-                a = a[(a[0].str.contains(word[i])) & (a[0].str[i] != word[i])]
-                absent_locations.add(i)
-                present_letters.add(word[i])
-            elif results[i] == "absent":
-                # wrong letter and location
-                absent_locations.add(i)
-                absent_letters.add(word[i])
-
-        # had to add this because "spool" caused a problem -> template:
-        # "PAPAP"; present, absent, present, absent, present
-        # O was present, then it was absent.
-        for letter in present_letters.intersection(absent_letters):
-            absent_letters.remove(letter)
+            return self.candidates[self.candidates != self.index.ids_by_word.get(word, -1)]
 
-        # clean up for absent locations should happen after we check for correct and present tiles
-        for i in absent_locations:
-            for letter in absent_letters:
-                a = a[a[0].str[i] != letter]
-
-        return a.reset_index(drop=True)
+        # had to handle "spool" because it caused a problem -> template:
+        # "PAPAP"; present, absent, present, absent, present
+        # O was present, then it was absent: one O at most, which the letter counts of the row's constraints cover.
+        with self.metrics.timer("browser_purge"):
+            if self.cache is None:
+                return self.keep(Constraints.from_results(word, results, self.index.width).mask(self.index))
+            key, code = self.cache_key(), results_code(results)
+            ids = self.cache.child(key, "browser", word, code)
+            if ids is None:
+                ids = self.keep(Constraints.from_results(word, results, self.index.width).mask(self.index))
+                ids = self.cache.store_child(key, "browser", word, code, ids)
+            return ids
 
     # guess for selenium - guess could probably be used here for DRY
     def browser_user_guess(self, word):
-        if len(self.dictionary[self.dictionary[0] == word]) == 0:
+        if not self.is_candidate(word):
             if self.print_statements:
                 print(f"Word {word} does not exist in dictionary.")
             return None
 
+        if self.hard_mode and not self.constraints.allows(word):
+            if self.print_statements:
+                print(f"Word {word} does not use everything revealed so far.")
+            return None
+
         if self.debug:
-            #print(f"{word}'s weight is {self.dictionary[self.dictionary[0] == word].reset_index(drop=True)['weights'][0]}.")
-            print(f"{word}'s weight is {self.dictionary[self.dictionary[0] == word]['weights'].iloc[0]}.")
+            print(f"{word}'s weight is {self.weight(word)}.")
         return self.browser_guess(word=word)
 
     # guess for selenium - guess could probably be used here for DRY
     def browser_guess(self, word=None):
         if word is None:
-            if self.guesses == 0:
-                w = self.weighted_word()
-            else:
-                w = self.avg_weighted_word()
+            w = self.select_word()
         else:
             w = word
 
@@ -352,45 +557,53 @@ class Wordle:
         if len(self.history) >= 6:
             return w
 
-        self.body.send_keys(w)
-        self.body.send_keys(Keys.RETURN)
+        from browser import erase_letters, submit_word
 
-        # async function here to wait for the attributes to load
-        response = self.gameboard.find_element(By.XPATH, f".//div[@aria-label='Row {len(self.history) + 1}']")
-        results = asyncio.run(self.check(response, max_wait=5))
+        submit_word(self.body, w)
+
+        # wait for the tiles to flip over
+        results = self.row_results(len(self.history) + 1, max_wait=5)
 
         if sum([1 for e in results if e == "empty"]) > 0:
             # if self.print_statements:
             #     # the word could not be long enough, maybe because the animation wasn't done loading for the tiles.
             #     # tbd
             #     #print("Word not long enough. Returning previously guessed word.")
+            self.metrics.count("empty_row_retries")
             return self.history[-1]
 
+        self.metrics.set_guess(self.guesses + 1)
+        self.metrics.record("candidates_before", len(self.candidates))
+        previous = self.candidates
         while sum([1 for e in results if e == "tbd"]) > 0:
             # remove the entry from the dictionary
-            self.dictionary = self.browser_purge(w, results)
+            self.metrics.count("tbd_retries")
+            self.candidates = self.browser_purge(w, results)
+            self.rejected.add(w)
             # backspace the characters
-            d = [self.body.send_keys(Keys.BACKSPACE) for e in results]
+            erase_letters(self.body, len(results))
 
-            w = self.avg_weighted_word()
-            self.body.send_keys(w)
-            self.body.send_keys(Keys.RETURN)
+            w = self.select_word()
+            submit_word(self.body, w)
 
-            response = self.gameboard.find_element(By.XPATH, f".//div[@aria-label='Row {len(self.history) + 1}']")
-            results = asyncio.run(self.check(response, max_wait=3))
+            results = self.row_results(len(self.history) + 1, max_wait=3)
 
         if w == "":
             if self.print_statements:
                 print("Could not generate a word; Returning previously guessed word.")
             return self.history[-1]
 
-        weight = self.dictionary[self.dictionary[0] == w]["weights"]
-        weight = weight.iloc[0] if len(weight) > 0 else 0
-        self.dictionary = self.browser_purge(w, results)
+        weight = self.weight(w)
+        self.candidates = self.browser_purge(w, results)
+        # browser_purge already leaves only words that agree with every row, as hard mode needs
+        self.constraints.update(w, results)
+        self.update_weights(previous)
+        self.metrics.record("candidates_after", len(self.candidates))
         self.guesses += 1
         self.history.append(w)
+        self.feedback.append(results_code(results))
         if self.print_statements:
-            print(f"Guess {self.guesses} is {w} ({weight}) with {len(self.dictionary)} options remaining out of {self.dictionary_length}.")
+            print(f"Guess {self.guesses} is {w} ({weight}) with {len(self.candidates)} options remaining out of {self.dictionary_length}.")
 
         return w
 
@@ -405,8 +618,7 @@ class Wordle:
         # In the other "response" variable used in browser_guess(), we add 1 to len(self.history), but we don't here,
         # because the rows on the game site are 1 indexed, and this method will only check the rows when self.history
         # is between 0 and 6 exclusive.
-        response = self.gameboard.find_element(By.XPATH, f".//div[@aria-label='Row {len(self.history)}']")
-        results = asyncio.run(self.check(response, max_wait=2))
+        results = self.row_results(len(self.history), max_wait=2)
         results = [1 for e in results if e == "correct"]
 
         if sum(results) == 5:
@@ -419,25 +631,50 @@ class Wordle:
         if len(self.history) == 0:
             return "tbd"
         if self.browser_game_over():
-            response = self.gameboard.find_element(By.XPATH, f".//div[@aria-label='Row {len(self.history)}']")
-            results = sum([1 for e in asyncio.run(self.check(response, max_wait=5)) if e.lower() == "correct"])
+            results = sum([1 for e in self.row_results(len(self.history), max_wait=5) if e.lower() == "correct"])
             return "win" if self.guesses <= 6 and results == 5 else "lose"
         return "tbd"
 
+    # tile states of a (1 indexed) row on the board. Rows that have finished flipping never change again, so they are
+    # only read from the browser once.
+    def row_results(self, row, max_wait=None):
+        if row in self.row_states:
+            return self.row_states[row]
+        from browser import find_row
+
+        response = find_row(self.gameboard, row)
+        results = self.check(response, max_wait=max_wait)
+        if sum([1 for e in results if e == "tbd" or e == "empty"]) == 0:
+            self.row_states[row] = results
+        return results
+
+    # makes sure the driver lets async scripts run for max_wait seconds and a margin. The script stops itself after
+    # max_wait, so the timeout is only set when the driver is opened and again if a longer wait comes along, rather than
+    # on every check.
+    def script_timeout(self, max_wait):
+        if self._script_timeout is None or max_wait + 5 > self._script_timeout:
+            self._script_timeout = max(max_wait, self.check_timeout) + 5
+            self.driver.set_script_timeout(self._script_timeout)
+
     # have to wait for the tiles to flip over in game, so this waits for them to do that then checks.
-    async def check(self, elem, max_wait=10):
-        s = dt.now()
-        while True:
-            if sum([1 for e in elem.find_elements(By.CSS_SELECTOR, "div[class*=Tile-module_tile]") if (ds := e.get_attribute("data-state")) == "tbd" or ds == "empty"]) == 0:
-                break
-            if (dt.now() - s).seconds >= max_wait:
-                break
-        l = [e.get_attribute("data-state") for e in elem.find_elements(By.CSS_SELECTOR, "div[class*=Tile-module_tile]")]
+    def check(self, elem, max_wait=None, poll_interval=None):
+        if max_wait is None:
+            max_wait = self.check_timeout
+        if poll_interval is None:
+            poll_interval = self.poll_interval
+        from browser import WAIT_FOR_TILES_JS
+
+        self.script_timeout(max_wait)
+        with self.metrics.timer("check"):
+            l = self.driver.execute_async_script(WAIT_FOR_TILES_JS, elem, int(max_wait * 1000), int(poll_interval * 1000))
         return l if sum([1 for e in l if e == 'tbd']) == 0 else ["tbd"] * 5
 
     # start the game
     def play(self):
+        self.metrics.start_game()
         if self.browser_game:
+            if self.driver is None:
+                raise RuntimeError("The game's webdriver was closed; reset() the game to play it again.")
             if self.print_statements:
                 print("Starting game.")
             while not self.browser_game_over():
@@ -450,48 +687,24 @@ class Wordle:
                 if not Path("./images/").exists():
                     Path("./images/").mkdir()
                 
-                wait = WebDriverWait(self.driver, 10) # waits up to 10 seconds
-                
-                close_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[class*=Modal-module_close]")))
-                actions = ActionChains(self.driver)
-                actions.move_to_element(close_button).click().perform()
-                close_button.click()
-
-                scroll_fn = f"""
-                    let container = document.querySelector('div[class*=App-module_gameContainer__]');
-                    container.scrollTop = container.scrollIntoView(true);
-                """
+                from browser import save_board
 
-                self.driver.execute_script(scroll_fn)
-
-                delete_toast_fn = """
-                    // Use the ^= (starts with) operator to select any element whose ID begins with the stable part.
-                    var element = document.querySelector('[id^="ToastContainer-module_gameToaster__"]');
-
-                    // Check if the element was found before attempting to remove it.
-                    if (element) {
-                        element.remove();
-                    }
-                """
-
-                self.driver.execute_script(delete_toast_fn)
-
-                time.sleep(1)
-                self.gameboard.find_element(By.XPATH, "../..").screenshot(f"./images/{now.year}_{now.month}_{now.day}_{self.browser_game_score()}.png")
+                save_board(self.driver, self.gameboard, f"./images/{now.year}_{now.month}_{now.day}_{self.browser_game_score()}.png")
 
             if self.print_statements:
                 print("Closing web driver.")
-            self.driver.close()
+            self.close()
         else:
             WORD = self.WORD
             while True:
                 word = self.guess()
 
-                if not (word != WORD and len(self.dictionary) > 0):
+                if not (word != WORD and len(self.candidates) > 0):
                     break
 
-            print(f"Took {self.guesses} guesses to guess {word} && {WORD}.")
-            print(game.history)
+            if self.print_statements:
+                print(f"Took {self.guesses} guesses to guess {word} && {WORD}.")
+                print(self.history)
 
 
 # custom funtion for assigning weights to words
@@ -499,12 +712,10 @@ def my_operation(x):
     return reduce(operator.mul, x, 1)
 
 
+# my_operation over every word at once, see word_store.compute_weights
+my_operation.batch = lambda terms: terms.prod(axis=1)
+
+
 if __name__ == "__main__":
-    game = Wordle(dictionary=["./dictionaries/all_words_question_mark.txt",
-                              "./dictionaries/five-letter-words_sgb-words.txt",
-                              "./dictionaries/english3.txt",
-                              "./dictionaries/more_words.txt",
-                              #"./dictionaries/Oxford English Dictionary Words.txt",
-                              "./dictionaries/usa.txt",
-                            ], operation=sum, browser_game=True, print_statements=True, starting_guess_word=None)
+    game = Wordle(dictionary=DICTIONARIES, operation=sum, browser_game=True, print_statements=True, starting_guess_word=None)
     game.play()
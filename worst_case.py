@@ -0,0 +1,322 @@
+import copy
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from patterns import ALL_CORRECT, code_results
+from transposition import fingerprint
+from wordle import Wordle, DICTIONARIES
+
+
+# How many guesses adversarial ("absurdle" style) feedback can force, over the whole dictionary as the answer space:
+#
+# strategy_worst_case: for the game's own strategy. The strategy is replayed on every feedback pattern the website
+#     could give, so every answer gets the number of guesses the strategy would need for it; the worst case is the
+#     largest of them and the hardest words are the answers that take it.
+# minimax_worst_case: the best any strategy could guarantee after the starting word - min over guesses, max over
+#     feedback patterns - searched to a depth limit with cutoffs and a cache of candidate sets already solved. Only
+#     a beam of the most promising guesses is tried at each position, so unless the beam is the whole dictionary the
+#     result is an upper bound, and positions not solved within the depth are reported as such.
+#
+# Both split the work by the feedback to the starting word and solve the groups in worker processes forked from
+# this one, the way simulate.py does, so the dictionary and the pattern matrix are loaded once and shared. Without
+# fork the groups are solved in this process.
+
+_game = None
+
+
+# the groups of ids that give the same feedback to word as {code: ids}
+def partition(game, word, ids):
+    row = game.pattern_row(word)[ids]
+    order = np.argsort(row, kind="stable")
+    codes, starts = np.unique(row[order], return_index=True)
+    return {int(c): ids[order[s:e]] for c, s, e in zip(codes, starts, list(starts[1:]) + [len(ids)])}
+
+
+# -- the game's strategy -----------------------------------------------------------------------------------------------
+
+# guesses the strategy needs for every answer in ids, as {word: guesses}, where history is the words guessed so far
+# and feedback their codes. Answers it can't get within max_guesses (or that it would guess around forever) get
+# max_guesses + 1.
+def strategy_guesses(game, ids, history, feedback, constraints, max_guesses):
+    if len(history) >= max_guesses:
+        return {str(game.index.words[i]): max_guesses + 1 for i in ids}
+
+    game.candidates = ids
+    game.guesses = len(history)
+    game.history = list(history)
+    game.feedback = list(feedback)
+    game.constraints = constraints
+    # ties are broken the same way every time a set of candidates is seen
+    game.random = random.Random(fingerprint(ids))
+    word = game.select_word()
+    if word == "":
+        return {str(game.index.words[i]): max_guesses + 1 for i in ids}
+
+    results = {}
+    for code, group in partition(game, word, ids).items():
+        if code == ALL_CORRECT:
+            results[str(word)] = len(history) + 1
+            continue
+        if len(group) == len(ids):
+            # the guess told us nothing, so the strategy would guess it again
+            results.update({str(game.index.words[i]): max_guesses + 1 for i in group})
+            continue
+        child = constraints
+        if game.hard_mode:
+            child = copy.deepcopy(constraints)
+            child.update(word, code_results(code, game.index.width))
+        results.update(strategy_guesses(game, group, history + [word], feedback + [code], child, max_guesses))
+    return results
+
+
+def _strategy_group(args):
+    code, group, max_guesses = args
+    constraints = copy.deepcopy(_game.constraints)
+    if _game.hard_mode:
+        constraints.update(_game.starting_guess_word, code_results(code, _game.index.width))
+    return strategy_guesses(_game, group, [_game.starting_guess_word], [code], constraints, max_guesses)
+
+
+# {word: guesses} for every word of the dictionary played by the game's strategy from its starting word
+def strategy_worst_case(game, max_guesses=10, workers=None, print_statements=True):
+    global _game
+    _game = game
+    _game.reset()
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    s = time.time()
+    saved = game.random
+    groups = partition(game, game.starting_guess_word, game.store.ids)
+    results = {}
+    if ALL_CORRECT in groups:
+        results[str(game.starting_guess_word)] = 1
+    tasks = [(code, group, max_guesses) for code, group in sorted(groups.items(), key=lambda e: -len(e[1])) if code != ALL_CORRECT]
+    try:
+        for part in _map(_strategy_group, tasks, workers):
+            results.update(part)
+    finally:
+        game.random = saved
+        game.reset()
+
+    if print_statements:
+        print(f"Played out {len(results)} answers in {time.time() - s:.1f}s.")
+    return results
+
+
+# -- minimax -----------------------------------------------------------------------------------------------------------
+
+# Depth limited minimax over the pattern matrix. value(ids) is the number of guesses needed to be sure of solving
+# ids when the feedback is as bad as it can be, trying only the beam words of the dictionary that split each set best
+# (so it is an upper bound on the true minimax value). Sets that can't be solved within the depth get depth + 1.
+# Guesses are cut off as soon as one of their groups is no better than the best guess so far, and sets are cached
+# by fingerprint, so a set reached again through other guesses is only searched once.
+class Minimax:
+    def __init__(self, patterns, size, beam=20, block=2048):
+        self.patterns = patterns
+        self.size = size
+        self.beam = beam
+        self.block = block
+        # fingerprint -> (lower bound, exact value or None) of the value of a candidate set
+        self.cache = {}
+        self.nodes = 0
+        self.hits = 0
+
+    # largest group and number of groups each guess splits ids into. The columns of ids are gathered once; sets with
+    # fewer words than there are feedback codes are measured by sorting each row and finding its runs, bigger ones
+    # with a histogram per row.
+    def splits(self, ids, guesses):
+        columns = np.asarray(self.patterns[:, ids])
+        largest = np.empty(len(guesses), dtype=np.int64)
+        groups = np.empty(len(guesses), dtype=np.int64)
+        n = len(ids)
+        for start in range(0, len(guesses), self.block):
+            rows = columns[guesses[start:start + self.block]]
+            if n <= ALL_CORRECT:
+                rows = np.sort(rows, axis=1)
+                starts = np.ones(rows.shape, dtype=bool)
+                starts[:, 1:] = rows[:, 1:] != rows[:, :-1]
+                positions = np.arange(n)
+                run = positions - np.maximum.accumulate(np.where(starts, positions, 0), axis=1) + 1
+                largest[start:start + len(rows)] = run.max(axis=1)
+                groups[start:start + len(rows)] = starts.sum(axis=1)
+            else:
+                rows = rows.astype(np.int64) + np.arange(len(rows))[:, None] * (ALL_CORRECT + 1)
+                counts = np.bincount(rows.ravel(), minlength=len(rows) * (ALL_CORRECT + 1)).reshape(-1, ALL_CORRECT + 1)
+                largest[start:start + len(rows)] = counts.max(axis=1)
+                groups[start:start + len(rows)] = (counts > 0).sum(axis=1)
+        return largest, groups
+
+    # the beam guesses to try at ids and the largest group each leaves, most promising first: the smallest largest
+    # group, then the most groups, then candidates (which might just be the answer)
+    def guesses(self, ids):
+        largest, groups = self.splits(ids, np.arange(self.size))
+        is_candidate = np.zeros(self.size, dtype=bool)
+        is_candidate[ids] = True
+        picked = np.lexsort((~is_candidate, -groups, largest))[:self.beam]
+        return picked, largest[picked]
+
+    # the value of ids if it is less than beta, otherwise some number >= beta
+    def value(self, ids, depth, beta=None):
+        if beta is None:
+            beta = depth + 1
+        n = len(ids)
+        if n == 1:
+            return 1
+        if depth <= 1:
+            return depth + 1
+        if n == 2:
+            return 2
+
+        key = fingerprint(ids)
+        lower, exact = self.cache.get(key, (2, None))
+        if key in self.cache:
+            self.hits += 1
+            if exact is not None:
+                return exact if exact <= depth else depth + 1
+            if lower >= beta:
+                return lower
+        if lower > depth:
+            return depth + 1
+        self.nodes += 1
+
+        limit = min(beta, depth + 1)
+        best = limit
+        guesses, largest = self.guesses(ids)
+        for g, big in zip(guesses, largest):
+            # a guess that leaves a group of 2 or more needs at least 3 guesses; one of 1 at least 2
+            if 1 + (1 if big == 1 else 2) >= best:
+                continue
+            row = np.asarray(self.patterns[g, ids])
+            codes, counts = np.unique(row, return_counts=True)
+            worst = 1
+            # the biggest groups first, they are the likeliest to cut the guess off
+            for c in codes[np.argsort(-counts, kind="stable")]:
+                if c == ALL_CORRECT:
+                    continue
+                worst = max(worst, 1 + self.value(ids[row == c], depth - 1, best - 1))
+                if worst >= best:
+                    break
+            if worst < best:
+                best = worst
+                if best <= lower:
+                    break
+
+        # below the limit the value is exact, otherwise all that is known is that it isn't below the limit
+        if best < limit:
+            self.cache[key] = (best, best)
+        else:
+            self.cache[key] = (max(lower, limit), None)
+        return best
+
+
+def _minimax_group(args):
+    code, group, depth, beam = args
+    search = Minimax(_game.patterns, _game.index.size, beam=beam)
+    v = search.value(group, depth)
+    return code, v, search.nodes, search.hits
+
+
+# Best worst case after the game's starting word: every feedback group of the starting word is searched on its own
+# (in parallel) with depth - 1 guesses left. Returns the overall worst case in guesses, counting the starting word,
+# and for every group its feedback code, size and worst case. A worst case of depth + 1 means "not solved within
+# depth guesses" rather than a number of guesses, and "solved" says whether that happened. Unless the beam takes in
+# the whole dictionary only some guesses are tried, so the worst cases are upper bounds ("exact" is False).
+def minimax_worst_case(game, depth=6, beam=20, workers=None, print_statements=True):
+    global _game
+    _game = game
+    _game.patterns
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    s = time.time()
+    groups = partition(game, game.starting_guess_word, game.store.ids)
+    tasks = [(code, group, depth - 1, beam) for code, group in sorted(groups.items(), key=lambda e: -len(e[1])) if code != ALL_CORRECT]
+    results = []
+    nodes = hits = 0
+    for code, v, n, h in _map(_minimax_group, tasks, workers):
+        results.append({"code": code, "size": len(groups[code]), "guesses": 1 + v, "solved": 1 + v <= depth,
+                        "words": [str(game.index.words[i]) for i in groups[code]]})
+        nodes += n
+        hits += h
+
+    results.sort(key=lambda e: (-e["guesses"], -e["size"]))
+    worst = max([e["guesses"] for e in results], default=1)
+    if print_statements:
+        print(f"Searched {nodes} positions ({hits} cache hits) in {time.time() - s:.1f}s.")
+    return {"starting_guess_word": game.starting_guess_word, "worst_case": worst, "solved": worst <= depth,
+            "exact": beam >= game.index.size, "depth": depth, "beam": beam, "groups": results}
+
+
+# a minimax worst case for printing: past the depth limit all that is known is that it takes more than depth guesses
+def guesses_text(guesses, depth):
+    return f"more than {depth}" if guesses > depth else str(guesses)
+
+
+# fn over the tasks in workers forked processes that inherit _game. The functions here take an already made game
+# rather than the arguments to make one, so where processes can't be forked (e.g. Windows) the tasks are run one
+# after the other in this process instead.
+def _map(fn, tasks, workers):
+    if workers <= 1 or len(tasks) <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return [fn(e) for e in tasks]
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(fn, tasks))
+
+
+# worst case, guess count distribution and the hardest words of strategy_worst_case results
+def summarize(results, max_guesses=10, hardest=20):
+    worst = max(results.values(), default=0)
+    distribution = Counter(results.values())
+    return {
+        "answers": len(results),
+        "worst_case": worst,
+        "mean_guesses": sum(results.values()) / len(results) if len(results) > 0 else 0,
+        "over_6": sum(1 for g in results.values() if g > 6),
+        "unsolved": sum(1 for g in results.values() if g > max_guesses),
+        "distribution": {str(k): distribution[k] for k in sorted(distribution)},
+        "hardest": sorted(results, key=lambda w: (-results[w], w))[:hardest],
+    }
+
+
+def print_report(report):
+    print(f"Worst case {report['worst_case']} guesses over {report['answers']} answers (mean {report['mean_guesses']:.3f}, "
+          f"{report['over_6']} over 6, {report['unsolved']} unsolved).")
+    for k, v in report["distribution"].items():
+        print(f"  {k}: {v}")
+    print(f"Hardest: {', '.join(report['hardest'])}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or len([e for e in sys.argv if "help" in e.lower()]) > 0:
+        print("Usage: python worst_case.py strategy [strategy_name] [starting_guess_word] [workers]")
+        print("       python worst_case.py minimax [depth] [beam] [starting_guess_word] [workers]")
+        print("Example: python worst_case.py strategy avg_weighted tares")
+    elif sys.argv[1] == "minimax":
+        game = Wordle(dictionary=DICTIONARIES, browser_game=False, print_statements=False, strategy="entropy",
+                      starting_guess_word=sys.argv[4] if len(sys.argv) > 4 else None)
+        report = minimax_worst_case(game, depth=int(sys.argv[2]) if len(sys.argv) > 2 else 6,
+                                    beam=int(sys.argv[3]) if len(sys.argv) > 3 else 20,
+                                    workers=int(sys.argv[5]) if len(sys.argv) > 5 else None)
+        depth = report["depth"]
+        if not report["solved"]:
+            print(f"{report['starting_guess_word']} isn't solved within {depth} guesses by the beam of {report['beam']} "
+                  f"guesses searched; adversarial feedback may force {guesses_text(report['worst_case'], depth)} guesses.")
+        elif report["exact"]:
+            print(f"{report['starting_guess_word']} can be forced to {report['worst_case']} guesses at best.")
+        else:
+            print(f"{report['starting_guess_word']} is always solved in at most {report['worst_case']} guesses (an upper "
+                  f"bound: only the best {report['beam']} guesses of every position were searched).")
+        for e in report["groups"][:10]:
+            print(f"  {code_results(e['code'])}: {e['size']} words, {guesses_text(e['guesses'], depth)} guesses - {', '.join(e['words'][:8])}")
+    else:
+        game = Wordle(dictionary=DICTIONARIES, browser_game=False, print_statements=False, seed=0,
+                      strategy=sys.argv[2] if len(sys.argv) > 2 else None,
+                      starting_guess_word=sys.argv[3] if len(sys.argv) > 3 else None)
+        print_report(summarize(strategy_worst_case(game, workers=int(sys.argv[4]) if len(sys.argv) > 4 else None)))